@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# benchmark.py
+#
+# Hot path benchmarks, no display needed:
+#   python3 benchmark.py                   run and compare with the baseline
+#   python3 benchmark.py --save-baseline   run and store the results as the baseline
+#   python3 benchmark.py --sizes 4 8 --ops make_move redraw
+#   python3 benchmark.py --startup         check import times against their budget
+#
+# Canvas redraws run against StubCanvas, which records items in dicts
+# instead of drawing, so the numbers cover MainCanvas' own work only.
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from itertools import cycle
+from typing import Callable, Dict, List, Optional
+
+sys.dont_write_bytecode = True
+
+from controller.controller import SquareState
+from controller.settings_manager import SettingsManager
+from model.engine import Engine, Move
+from view.main_canvas import MainCanvas
+
+DEFAULT_SIZES = [2, 3, 4, 6, 8, 12, 16, 24, 32]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# a case keeps running until both limits are reached, or max_iters
+MIN_TIME = 0.2
+MIN_ITERS = 20
+MAX_ITERS = 100_000
+
+# slowdowns smaller than this are jitter, whatever their ratio
+MIN_REGRESSION_US = 1.0
+
+# sub-microsecond ops are timed in runs of this length, else clock overhead
+# dominates
+MIN_SAMPLE = 20e-6
+
+# cold-start budget: module -> (import time in ms, modules it must not load).
+# The engine has to stay cheap to import for batch workers; the controller
+# import is the app's startup before the Tk window is created. The times
+# leave room for a loaded single-core machine, where the fastest of
+# STARTUP_RUNS still varies by about 20%
+STARTUP_BUDGETS = {
+    "model.engine": (75.0, (
+        "tkinter", "PIL", "multiprocessing", "argparse",
+        "model.compat", "model.generate", "model.parallel",
+    )),
+    "controller.controller": (150.0, (
+        "PIL", "multiprocessing", "argparse", "mmap",
+        "model.generate", "model.pack", "model.parallel", "model.replay",
+    )),
+}
+STARTUP_RUNS = 5
+
+STARTUP_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+print(dt * 1e3)
+print(" ".join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+
+class StubCanvas:
+    """Just enough of tk.Canvas for MainCanvas, keeping items in a dict."""
+
+    def __init__(self, width: int = 1600, height: int = 900):
+        self.items: Dict[int, dict] = {}
+        self.next_id = 1
+        self.width = width
+        self.height = height
+        self.left = 0
+        self.top = 0
+
+    def create(self, kind, *coords, **options):
+        item = self.next_id
+        self.next_id += 1
+        options["kind"] = kind
+        options["coords"] = coords
+        self.items[item] = options
+        return item
+
+    def create_rectangle(self, *coords, **options):
+        return self.create("rectangle", *coords, **options)
+
+    def create_polygon(self, *coords, **options):
+        return self.create("polygon", *coords, **options)
+
+    def create_text(self, *coords, **options):
+        return self.create("text", *coords, **options)
+
+    def create_image(self, *coords, **options):
+        return self.create("image", *coords, **options)
+
+    def itemconfig(self, item, **options):
+        self.items[item].update(options)
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = coords
+
+    def delete(self, tag):
+        if tag == "all":
+            self.items.clear()
+        else:
+            self.items.pop(tag, None)
+
+    def move(self, tag, dx, dy):
+        pass
+
+    def tag_raise(self, *args):
+        pass
+
+    def config(self, **options):
+        pass
+
+    def canvasx(self, x):
+        return self.left + x
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def focus_set(self):
+        pass
+
+    def pack(self, *args, **kwargs):
+        pass
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    k = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return sorted_values[k]
+
+
+def measure(op: Callable[[], None], before: Optional[Callable[[], None]] = None) -> dict:
+    # Per-call latencies of op. before runs untimed ahead of each call; without
+    # it, fast ops are timed in runs of several calls and averaged per run
+    clock = time.perf_counter
+    repeat = 1
+    if before is None:
+        t0 = clock()
+        op()
+        repeat = max(1, int(MIN_SAMPLE / max(clock() - t0, 1e-9)))
+    calls = range(repeat)
+
+    times = []
+    total = 0.0
+    while len(times) < MAX_ITERS and (total < MIN_TIME or len(times) < MIN_ITERS):
+        if before:
+            before()
+        t0 = clock()
+        for _ in calls:
+            op()
+        dt = clock() - t0
+        times.append(dt / repeat)
+        total += dt
+
+    times.sort()
+    return {
+        "iters": len(times) * repeat,
+        "ops_per_sec": len(times) * repeat / total if total else 0.0,
+        "p50_us": percentile(times, 0.50) * 1e6,
+        "p99_us": percentile(times, 0.99) * 1e6,
+    }
+
+
+def random_move(rng: random.Random, size: int) -> Move:
+    return Move(rng.randrange(size), rng.randrange(2 * size), rng.randrange(size), rng.randrange(2 * size))
+
+
+def scrambled_engine(size: int, rng: random.Random) -> Engine:
+    # a game partly moved onto the RHS, so mismatch tracking has work to do
+    engine = Engine()
+    engine.new_game(size, rng)
+    for _ in range(size * size):
+        engine.make_move(random_move(rng, size))
+    return engine
+
+
+def bench_engine(op_name: str, size: int, rng: random.Random) -> dict:
+    engine = scrambled_engine(size, rng)
+
+    if op_name == "new_game":
+        return measure(lambda: engine.new_game(size, rng))
+    if op_name == "make_move":
+        moves = cycle([random_move(rng, size) for _ in range(1024)])
+        return measure(lambda: engine.make_move(next(moves)))
+    if op_name == "is_solved":
+        return measure(engine.is_solved)
+    if op_name == "get_wrong_coords":
+        return measure(engine.get_wrong_coords)
+    if op_name == "get_hint_coords":
+        return measure(engine.get_hint_coords)
+    if op_name == "get_fit_coords":
+        # a move, then the fits of a random selection, as on a click
+        def select():
+            engine.get_fit_coords(rng.randrange(size), rng.randrange(2 * size))
+        return measure(select, lambda: engine.make_move(random_move(rng, size)))
+    raise ValueError(op_name)
+
+
+def bench_redraw(op_name: str, size: int, rng: random.Random) -> dict:
+    engine = scrambled_engine(size, rng)
+    settings = SettingsManager()
+    # without a root MainCanvas never loads tile images, which need a
+    # running interpreter; the stub measures the vector path
+    canvas = MainCanvas(None, None, StubCanvas())
+
+    def draw():
+        squares = SquareState(None, engine.get_wrong_coords(), engine.get_hint_coords(), [])
+        canvas.redraw(engine.get_state(), settings.get_state(), squares)
+
+    draw()
+    if op_name == "redraw":
+        # the common case: one move, then a redraw
+        return measure(draw, lambda: engine.make_move(random_move(rng, size)))
+    if op_name == "redraw_rebuild":
+        # first draw of a new layout, every canvas item created
+        def reset():
+            canvas.layout = None
+        return measure(draw, reset)
+    raise ValueError(op_name)
+
+
+OPS = {
+    "new_game": bench_engine,
+    "make_move": bench_engine,
+    "is_solved": bench_engine,
+    "get_wrong_coords": bench_engine,
+    "get_hint_coords": bench_engine,
+    "get_fit_coords": bench_engine,
+    "redraw": bench_redraw,
+    "redraw_rebuild": bench_redraw,
+}
+
+
+def run(sizes: List[int], ops: List[str], seed: int, rounds: int) -> Dict[str, dict]:
+    # each case runs rounds times and keeps its fastest round, which filters
+    # out most scheduler and frequency-scaling noise
+    results = {}
+    for op_name in ops:
+        for size in sizes:
+            key = "{}/{}".format(op_name, size)
+            runs = [OPS[op_name](op_name, size, random.Random(seed)) for _ in range(rounds)]
+            results[key] = min(runs, key=lambda result: result["p50_us"])
+            print_row(key, results[key])
+    return results
+
+
+def check_startup(runs: int = STARTUP_RUNS) -> List[str]:
+    # each module is imported in fresh interpreters, fastest run kept
+    failures = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    print("{:<24} {:>12} {:>12}  {}".format("import", "budget ms", "ms", "unwanted modules"))
+    for module, (budget, forbidden) in STARTUP_BUDGETS.items():
+        code = STARTUP_PROBE.format(module=module, forbidden=forbidden)
+        best = float("inf")
+        loaded = ""
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", code], cwd=here, check=True, capture_output=True, text=True
+            ).stdout.split("\n")
+            best = min(best, float(out[0]))
+            loaded = out[1]
+        flag = ""
+        if best > budget or loaded:
+            flag = "OVER BUDGET" if best > budget else "UNWANTED IMPORT"
+            failures.append(module)
+        print("{:<24} {:>12.0f} {:>12.1f}  {} {}".format(module, budget, best, loaded or "-", flag).rstrip())
+    return failures
+
+
+def print_row(key: str, result: dict):
+    print("{:<24} {:>12.0f} {:>12.2f} {:>12.2f}".format(
+        key, result["ops_per_sec"], result["p50_us"], result["p99_us"]
+    ))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    # a case regresses when its median latency grows by more than tolerance
+    # and by more than MIN_REGRESSION_US
+    regressions = []
+    print()
+    print("{:<24} {:>12} {:>12} {:>8}".format("vs baseline", "base p50", "p50", "change"))
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        change = result["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+        flag = ""
+        if change > tolerance and result["p50_us"] - base["p50_us"] > MIN_REGRESSION_US:
+            flag = "REGRESSION"
+            regressions.append(key)
+        print("{:<24} {:>12.1f} {:>12.1f} {:>+7.0%}  {}".format(
+            key, base["p50_us"], result["p50_us"], change, flag
+        ).rstrip())
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark engine and canvas hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ops", nargs="+", choices=list(OPS), default=list(OPS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3, help="runs per case, the fastest is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown, 0.25 = 25%%")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--startup", action="store_true", help="only check import times against STARTUP_BUDGETS")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        failures = check_startup()
+        if failures:
+            print("\n{} over budget: {}".format(len(failures), ", ".join(failures)))
+            return 1
+        return 0
+
+    print("{:<24} {:>12} {:>12} {:>12}".format("case", "ops/sec", "p50 us", "p99 us"))
+    results = run(args.sizes, args.ops, args.seed, args.rounds)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print("baseline saved to {}".format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline at {}, run with --save-baseline".format(args.baseline))
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n{} regression(s): {}".format(len(regressions), ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,44 @@
 # controller.py 
 
 from dataclasses import dataclass 
-from typing import List, Tuple, Optional
+from typing import TYPE_CHECKING, List, Tuple, Optional
+import os
+import queue
+import random
 
 from model.engine import Engine, Move
+from model.hints import HintPlan, HintWorker
+from model.history import MoveLog
+from model.savegame import AutoSaver, encode_game, load_game
+from controller.profiler import Profiler
 from controller.settings_manager import SettingsManager
 from view.main_window import MainWindow
 
+# packs and recordings are opt-in, so model.pack and model.replay are
+# imported when one is first opened
+if TYPE_CHECKING:
+    from model.pack import PuzzlePack
+
+# zoom range in tile pixels, the factor per zoom step, and how long zoom
+# input has to pause before the board is redrawn at the new size
+MIN_TILE_SIZE = 20
+MAX_TILE_SIZE = 300
+ZOOM_STEP = 1.1
+ZOOM_SETTLE_MS = 200
+
+# how often the Tk thread checks for hint results while a solve runs
+HINT_POLL_MS = 30
+
+# set to a file path to append every dealt game and its moves there,
+# for replay with python -m model.replay
+RECORD_ENV = "TETRAVEX_RECORD"
+
 @dataclass
 class SquareState:
     clicked_square: Optional[Tuple[int, int]]
     bad_coords: List[Tuple[int, int]]
     hint_coords: List[Tuple[int, int]]
+    fit_coords: List[Tuple[int, int]]
 
 
 class Controller:
@@ -20,12 +47,18 @@ class Controller:
 
         self.engine = Engine()
         self.settings_manager = SettingsManager()
+        self.profiler = Profiler.from_env()
+        self.show_profiler = False
+        self.refresh_pending = False
+        self.zoom_target: Optional[float] = None
+        self.zoom_job = None
         self.main_window = MainWindow(root, self)
         
         # game variables
         self.clicked_square = None
         self.bad_coords: List[Tuple[int, int]] = []
         self.hint_coords: List[Tuple[int, int]] = []
+        self.fit_coords: List[Tuple[int, int]] = []
         
         self.current_board_state = self.engine.get_state()
         self.current_setting_state = self.settings_manager.get_state()
@@ -33,16 +66,82 @@ class Controller:
         self.last_size = 3
         self.seen_win = False
 
+        # open puzzle pack, if any, and the puzzle being played from it
+        self.pack: Optional["PuzzlePack"] = None
+        self.pack_index = 0
+
+        # the game is saved after every refresh and restored on startup
+        self.autosaver = AutoSaver()
+
+        # Hints come from a solution plan kept valid across moves, refreshed
+        # by a solver process working on the current tiles after player moves.
+        # hint_generation counts board changes so stale results are dropped
+        self.hint_worker = HintWorker()
+        self.move_log = MoveLog()
+        self.hint_generation = 0
+        self.hint_plan: Optional[HintPlan] = None
+        self.hint_ready = False
+        self.hint_wanted = False
+        self.hint_poll_job = None
+
+        # seed of the dealt game, None for pack puzzles and restored games
+        record_path = os.environ.get(RECORD_ENV)
+        self.recorder = None
+        if record_path:
+            from model.replay import RecordingWriter
+
+            self.recorder = RecordingWriter(record_path)
+        self.game_seed: Optional[int] = None
+
         # setup new game
-        self.on_new_game(self.last_size)
+        if not self.restore_game():
+            self.on_new_game(self.last_size)
 
     def on_new_game(self, size: int):
+        self.record_game()
+        self.game_seed = random.getrandbits(63)
+        self.engine.new_game(size, random.Random(self.game_seed))
+        self.root.title("Tetravex App")
+        self.start_game()
+
+    def on_open_pack(self, path: str):
+        from model.pack import PuzzlePack
+
+        pack = PuzzlePack(path)
+        if not len(pack):
+            pack.close()
+            raise ValueError("{} holds no puzzles".format(path))
+        if self.pack:
+            self.pack.close()
+        self.pack = pack
+        self.on_goto_puzzle(0)
+
+    def on_goto_puzzle(self, index: int):
+        if not self.pack:
+            return
+        self.pack_index = index
+        self.record_game()
+        self.game_seed = None
+        size, tiles = self.pack.tiles(index)
+        self.engine.load_tiles(size, tiles)
+        self.root.title("Tetravex App - puzzle {} of {}".format(index + 1, len(self.pack)))
+        self.start_game()
+
+    def on_next_puzzle(self):
+        if self.pack and self.pack_index + 1 < len(self.pack):
+            self.on_goto_puzzle(self.pack_index + 1)
+
+    def get_pack_size(self) -> int:
+        return len(self.pack) if self.pack else 0
+
+    def start_game(self):
         self.clicked_square = None 
         self.bad_coords.clear()
         self.hint_coords.clear()
         self.seen_win = False
+        self.move_log.clear()
+        self.reset_hint_plan()
         
-        self.engine.new_game(size)
         self.current_board_state = self.engine.get_state()
         self.current_setting_state = self.settings_manager.get_state()
 
@@ -50,7 +149,50 @@ class Controller:
         self.refresh()
     
     def on_quit(self):
+        self.hint_worker.close()
+        self.record_game()
+        if self.recorder:
+            self.recorder.close()
+        self.profiler.dump()
+        self.autosave()
+        self.autosaver.close(timeout=2.0)
         self.root.quit()
+
+    def record_game(self):
+        if self.recorder and self.game_seed is not None and len(self.move_log):
+            from model.replay import Recording
+
+            size = self.engine.board.num_rows
+            self.recorder.add(Recording(size, self.game_seed, self.move_log.done()))
+            self.recorder.flush()
+
+    def autosave(self):
+        # encoding takes microseconds; the write happens on the autosave thread
+        self.autosaver.submit(encode_game(
+            self.engine.board,
+            self.clicked_square,
+            self.hint_coords,
+            self.seen_win,
+        ))
+
+    def restore_game(self) -> bool:
+        try:
+            saved = load_game(self.autosaver.path)
+            self.engine.set_board(saved.board)
+        except (OSError, ValueError):
+            return False
+
+        self.clicked_square = saved.clicked_square
+        self.hint_coords = saved.hint_coords
+        self.seen_win = saved.seen_win
+        self.game_seed = None
+        self.move_log.clear()
+        self.reset_hint_plan()
+        self.current_board_state = self.engine.get_state()
+        self.current_setting_state = self.settings_manager.get_state()
+        self.resize_window()
+        self.refresh()
+        return True
     
     def get_mouse_coords(self, event) -> Optional[Tuple[int, int]]:
         self.current_board_state = self.engine.get_state()
@@ -62,15 +204,16 @@ class Controller:
         tile    = self.current_setting_state.tile_size
         margin  = self.current_setting_state.tile_size // 2
 
-        i = event.y // tile
+        x, y = self.main_window.canvas.event_coords(event)
+        i = y // tile
 
         # Determine column index with margin adjustment
-        if event.x < size * tile:
-            j = event.x // tile
-        elif event.x < size * tile + margin:
+        if x < size * tile:
+            j = x // tile
+        elif x < size * tile + margin:
             return
         else:
-            j = (event.x - margin) // tile
+            j = (x - margin) // tile
         
         # bounds check
         if i < 0 or j < 0 or i >= numRows or j >= numCols:
@@ -79,11 +222,42 @@ class Controller:
         coord = (i, j)
         return coord
     
-    def on_make_move(self, i1, j1, i2, j2):
+    def on_make_move(self, i1, j1, i2, j2, from_hint: bool = False):
+        if (i1, j1) != (i2, j2):
+            num_cols = self.engine.board.num_cols
+            self.move_log.record(i1 * num_cols + j1, i2 * num_cols + j2)
+        self.apply_move(i1, j1, i2, j2, from_hint)
+
+    def on_undo(self):
+        self.step_history(self.move_log.undo())
+
+    def on_redo(self):
+        self.step_history(self.move_log.redo())
+
+    def step_history(self, cells: Optional[Tuple[int, int]]):
+        # a swap undoes itself, so undo and redo replay it through the
+        # engine's incremental make_move
+        if cells is None:
+            return
+        num_cols = self.engine.board.num_cols
+        (i1, j1), (i2, j2) = divmod(cells[0], num_cols), divmod(cells[1], num_cols)
+        self.apply_move(i1, j1, i2, j2)
+
+    def apply_move(self, i1, j1, i2, j2, from_hint: bool = False):
         my_move = Move(i1, j1, i2, j2)
-        self.engine.make_move(my_move)
+        with self.profiler.phase("make_move"):
+            self.engine.make_move(my_move)
         self.clicked_square = None
         self.hint_coords.clear()
+
+        # the plan stays a valid solution after any swap; a player's own
+        # move may have fixed tiles the plan would move, so solve again.
+        # A solve still running was given the board before this move, so
+        # its plan would be stale: any move then counts as a change
+        if self.hint_plan:
+            self.hint_plan.swap((i1, j1), (i2, j2))
+        if not from_hint or not self.hint_ready:
+            self.request_hint_plan()
         
         self.refresh()
 
@@ -93,7 +267,8 @@ class Controller:
         if self.seen_win:
             return
         
-        res = self.engine.is_solved()
+        with self.profiler.phase("is_solved"):
+            res = self.engine.is_solved()
         if not res:
             return
         
@@ -101,7 +276,12 @@ class Controller:
         self.main_window.win_popup.trigger()
     
     def on_click(self, event):
-        coord = self.get_mouse_coords(event)
+        with self.profiler.phase("click"):
+            self.handle_click(event)
+
+    def handle_click(self, event):
+        with self.profiler.phase("mouse_coords"):
+            coord = self.get_mouse_coords(event)
 
         if not coord:
             self.clicked_square = None
@@ -120,51 +300,155 @@ class Controller:
             self.refresh()
     
     def on_get_hint(self):
+        with self.profiler.phase("hint"):
+            self.handle_hint()
+
+    def handle_hint(self):
         if self.hint_coords:
             self.on_make_move(
                 self.hint_coords[0][0],
                 self.hint_coords[0][1],
                 self.hint_coords[1][0],
-                self.hint_coords[1][1]
+                self.hint_coords[1][1],
+                from_hint=True
             )
+        elif self.hint_plan or self.hint_ready:
+            self.show_hint()
         else:
-            self.hint_coords = self.engine.get_hint_coords()
-            self.refresh()
+            # no plan yet; poll_hints shows the hint once the solve is done
+            self.hint_wanted = True
+
+    def show_hint(self):
+        # from the solver plan, or toward the generated arrangement when the
+        # solver gave up within its budget
+        with self.profiler.phase("hint_coords"):
+            if self.hint_plan:
+                self.hint_coords = self.hint_plan.next_move()
+            else:
+                self.hint_coords = self.engine.get_hint_coords()
+        self.refresh()
+
+    def reset_hint_plan(self):
+        # a new board starts from its generated arrangement; the solver only
+        # comes in once the player's own moves are worth keeping
+        self.hint_generation += 1
+        self.hint_plan = HintPlan.from_homes(self.engine.board)
+        self.hint_ready = True
+        self.hint_wanted = False
+
+    def request_hint_plan(self):
+        # Called after every change to the tiles. Speculatively solves the
+        # new board so Ctrl-H can answer at once; submitting cancels the
+        # previous search
+        self.hint_generation += 1
+        self.hint_ready = False
+        self.hint_worker.submit(self.hint_generation, self.engine.board.copy())
+        if self.hint_poll_job is None:
+            self.hint_poll_job = self.root.after(HINT_POLL_MS, self.poll_hints)
+
+    def poll_hints(self):
+        self.hint_poll_job = None
+        while True:
+            try:
+                generation, plan = self.hint_worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.hint_generation:
+                self.hint_ready = True
+                if plan or not self.hint_plan:
+                    self.hint_plan = plan
+
+        if not self.hint_ready:
+            self.hint_poll_job = self.root.after(HINT_POLL_MS, self.poll_hints)
+        elif self.hint_wanted:
+            self.hint_wanted = False
+            self.show_hint()
     
     def get_square_state(self):
-        self.bad_coords = self.engine.get_wrong_coords()
+        with self.profiler.phase("wrong_coords"):
+            self.bad_coords = self.engine.get_wrong_coords()
+
+        # cells the selected tile fits, from the engine's compatibility index
+        self.fit_coords = []
+        if self.clicked_square and self.settings_manager.enable_fit_rect:
+            with self.profiler.phase("fit_coords"):
+                self.fit_coords = self.engine.get_fit_coords(*self.clicked_square)
 
         return SquareState(
             self.clicked_square,
             self.bad_coords,
-            self.hint_coords
+            self.hint_coords,
+            self.fit_coords
         )
 
     def refresh(self):
-        board_state = self.engine.get_state()
-        settings_state = self.settings_manager.get_state() 
-        square_state = self.get_square_state()
-        
-        self.main_window.canvas.redraw(
-            board_state, 
-            settings_state, 
-            square_state
-        )
+        # Marks the view dirty. The paint runs once the event queue is idle,
+        # so a burst of refresh calls from one action or fast input costs
+        # a single frame
+        if self.refresh_pending:
+            return
+        self.refresh_pending = True
+        self.root.after_idle(self.paint)
+
+    def paint(self):
+        self.refresh_pending = False
+        profiler = self.profiler
+        canvas = self.main_window.canvas
+        items_before = canvas.items_created
+
+        with profiler.phase("paint"):
+            board_state = self.engine.get_state()
+            settings_state = self.settings_manager.get_state() 
+            square_state = self.get_square_state()
+            
+            with profiler.phase("redraw"):
+                canvas.redraw(
+                    board_state, 
+                    settings_state, 
+                    square_state
+                )
+            with profiler.phase("autosave"):
+                self.autosave()
+
+        profiler.end_frame(canvas.items_created - items_before)
+        if self.show_profiler and profiler.overlay_due():
+            canvas.show_debug(profiler.overlay_lines())
+
+    def on_toggle_profiler(self):
+        # Ctrl-D: profiling with a live overlay, starting from fresh numbers
+        self.show_profiler = not self.show_profiler
+        if self.show_profiler:
+            self.profiler.enabled = True
+            self.profiler.reset()
+            self.refresh()
+        else:
+            self.profiler.enabled = bool(self.profiler.dump_path)
+            self.main_window.canvas.hide_debug()
 
     def on_zoom_out(self): 
-        MIN_TILE_SIZE = 50
-        ts = self.current_setting_state.tile_size 
-        ts = max(MIN_TILE_SIZE, ts - 10)
-        
-        self.settings_manager.set_tile_size(ts)
-        self.current_setting_state = self.settings_manager.get_state()
-        self.resize_window()
-        self.refresh()
+        self.on_zoom(1 / ZOOM_STEP)
 
     def on_zoom_in(self):
-        MAX_TILE_SIZE = 200
-        ts = self.current_setting_state.tile_size 
-        ts = min(MAX_TILE_SIZE, ts + 10)
+        self.on_zoom(ZOOM_STEP)
+
+    def on_zoom(self, factor: float):
+        # The canvas scales what it already shows right away; the board is
+        # redrawn at the new tile size once no zoom input came for a while
+        ts = self.current_setting_state.tile_size
+        target = (self.zoom_target or ts) * factor
+        target = max(MIN_TILE_SIZE, min(MAX_TILE_SIZE, target))
+        self.zoom_target = target
+
+        self.main_window.canvas.preview_zoom(target / ts)
+
+        if self.zoom_job:
+            self.root.after_cancel(self.zoom_job)
+        self.zoom_job = self.root.after(ZOOM_SETTLE_MS, self.finish_zoom)
+
+    def finish_zoom(self):
+        self.zoom_job = None
+        ts = round(self.zoom_target)
+        self.zoom_target = None
         
         self.settings_manager.set_tile_size(ts)
         self.current_setting_state = self.settings_manager.get_state()
@@ -180,8 +464,13 @@ class Controller:
         ts = self.current_setting_state.tile_size 
 
         m = ts // 2
-        w = num_cols * ts + m
-        h = num_rows * ts
+        bar_w, bar_h = self.main_window.canvas.scrollbar_size()
+        w = num_cols * ts + m + bar_w
+        h = num_rows * ts + bar_h
+
+        # boards bigger than the screen scroll instead
+        w = min(w, self.root.winfo_screenwidth() * 9 // 10)
+        h = min(h, self.root.winfo_screenheight() * 8 // 10)
 
         self.root.geometry("{}x{}".format(w, h))
 
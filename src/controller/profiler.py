@@ -0,0 +1,149 @@
+# profiler.py
+#
+# Opt-in timing of input handling and paints. Set TETRAVEX_PROFILE=timings.json
+# to profile from startup and dump the numbers on quit, or press Ctrl-D in the
+# game to toggle profiling with a live overlay.
+
+import bisect
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+PROFILE_ENV = "TETRAVEX_PROFILE"
+
+# samples kept per phase for the rolling statistics
+WINDOW = 1000
+
+# the overlay is rebuilt at most this often, seconds
+OVERLAY_INTERVAL = 0.25
+
+# histogram bucket upper bounds in microseconds; the last bucket is open
+BUCKETS_US = [10, 30, 100, 300, 1000, 3000, 10000, 30000, 100000]
+
+
+class NullPhase:
+    # what phase() hands out while profiling is off: entering and leaving
+    # it is two empty method calls
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1e6)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False, dump_path: Optional[str] = None):
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self.samples: Dict[str, Deque[float]] = {}
+        self.totals: Dict[str, int] = {}
+        self.last_frame: Dict[str, float] = {}
+        self.frames = 0
+        self.overlay_time = 0.0
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        path = os.environ.get(PROFILE_ENV)
+        return cls(enabled=bool(path), dump_path=path or None)
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def add(self, name: str, value: float):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=WINDOW)
+            self.totals[name] = 0
+        samples.append(value)
+        self.totals[name] += 1
+        self.last_frame[name] = value
+
+    def end_frame(self, items_created: int):
+        # called once per redraw; items_created counts new canvas items
+        if not self.enabled:
+            return
+        self.add("frame.items_created", items_created)
+        self.frames += 1
+
+    def reset(self):
+        self.samples.clear()
+        self.totals.clear()
+        self.last_frame.clear()
+        self.frames = 0
+        self.overlay_time = 0.0
+
+    def stats(self) -> Dict[str, dict]:
+        out = {}
+        for name, samples in sorted(self.samples.items()):
+            values = sorted(samples)
+            histogram = [0] * (len(BUCKETS_US) + 1)
+            for value in values:
+                histogram[bisect.bisect_left(BUCKETS_US, value)] += 1
+            out[name] = {
+                "count": self.totals[name],
+                "window": len(values),
+                "p50": percentile(values, 0.50),
+                "p90": percentile(values, 0.90),
+                "p99": percentile(values, 0.99),
+                "max": values[-1],
+                "histogram": histogram,
+            }
+        return out
+
+    def dump(self, path: Optional[str] = None):
+        path = path or self.dump_path
+        if not path:
+            return
+        with open(path, "w") as f:
+            json.dump({
+                "frames": self.frames,
+                "units": "us, except frame.items_created",
+                "buckets_us": BUCKETS_US,
+                "phases": self.stats(),
+            }, f, indent=1)
+
+    def overlay_due(self) -> bool:
+        # stats() sorts every window, so the overlay is not redone each frame
+        now = time.perf_counter()
+        if now - self.overlay_time < OVERLAY_INTERVAL:
+            return False
+        self.overlay_time = now
+        return True
+
+    def overlay_lines(self) -> List[str]:
+        # last value and rolling p99 per phase, for the debug overlay
+        lines = ["{:<22} {:>9} {:>9}".format("phase", "last", "p99")]
+        for name, stat in self.stats().items():
+            lines.append("{:<22} {:>9.0f} {:>9.0f}".format(name, self.last_frame.get(name, 0), stat["p99"]))
+        return lines
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
@@ -9,11 +9,53 @@ COLOR_TAN   = "#d2b48c"
 COLOR_BLACK = "#000000"
 COLOR_WHITE = "#d0d0d0"
 
+# palette tables cover every non-negative int8 edge value
+NUM_EDGE_VALUES = 128
+
+def get_font_color(hex_color) -> str:
+    r = int(hex_color[1:3], 16)
+    g = int(hex_color[3:5], 16)
+    b = int(hex_color[5:7], 16)
+    
+    luminance = 0.299 * r + 0.587 * g + 0.114 * b
+    
+    return "#ffffff" if luminance < 128 else "#000000"
+
+def dim_color(color) -> str:
+    r = int(color[1:3], 16)
+    g = int(color[3:5], 16)
+    b = int(color[5:7], 16)
+    
+    # special highlight for stencil theme
+    if (r == 0 and g == 0 and b == 0):
+        return "#220022"
+
+    offset = 40 
+    r = max(0, r - offset)
+    g = max(0, g - offset)
+    b = max(0, b - offset)
+
+    return "#{:02x}{:02x}{:02x}".format(r, g, b)
+
+@dataclass
+class Palette:
+    # per edge value lookups
+    fill: List[str]
+    dim_fill: List[str]
+    text: List[str]
+    # shared colours
+    tri_outline: str
+    grid_bg: str
+    dim_grid_bg: str
+    grid_outline: str
+
 @dataclass
 class SettingsState:
     theme: "Theme"
     enable_bad_rect: bool 
+    enable_fit_rect: bool
     tile_size: int
+    palette: "Palette"
 
 class Theme:
     def __init__(self,
@@ -33,6 +75,35 @@ class Theme:
 
         self.colors = colors
         self.tri_outline = tri_outline
+
+        self.palette = None
+
+    def get_palette(self) -> "Palette":
+        # colour math is done once per theme, then only looked up
+        if self.palette is None:
+            self.palette = self.compile_palette()
+        return self.palette
+
+    def compile_palette(self) -> "Palette":
+        default = '#000000'
+        fill = [default] * NUM_EDGE_VALUES
+        dim_fill = [dim_color(default)] * NUM_EDGE_VALUES
+        text = [get_font_color(default)] * NUM_EDGE_VALUES
+        for val, color in self.colors.items():
+            if isinstance(val, int) and 0 <= val < NUM_EDGE_VALUES:
+                fill[val] = color
+                dim_fill[val] = dim_color(color)
+                text[val] = get_font_color(color)
+
+        return Palette(
+            fill=fill,
+            dim_fill=dim_fill,
+            text=text,
+            tri_outline=self.colors.get('outline', default),
+            grid_bg=self.grid_bg,
+            dim_grid_bg=dim_color(self.grid_bg),
+            grid_outline=self.grid_outline,
+        )
     
 class SettingsManager:
     def __init__(self):
@@ -40,7 +111,9 @@ class SettingsManager:
         self.load_themes()
         
         self.current_theme: "Theme" = self.themes[0]
+        self.current_theme.get_palette()
         self.enable_bad_rect: bool = True
+        self.enable_fit_rect: bool = False
         self.tile_size: int = 100
 
     def load_themes(self) -> None:
@@ -92,10 +165,12 @@ class SettingsManager:
             rgb = [random.randint(50, 200) for _ in range(3)]
             random_colors[i] = "#{:02x}{:02x}{:02x}".format(*rgb)
         
-        return Theme(
+        theme = Theme(
             name="Random", 
             colors=random_colors
         )
+        theme.get_palette()
+        return theme
     
     def get_theme_names(self) -> List[str]:
         theme_names = []
@@ -111,11 +186,15 @@ class SettingsManager:
                     self.current_theme = self.themes[idx]
                     return
                 self.current_theme = theme 
+                self.current_theme.get_palette()
                 return 
     
     def set_enable_bad_rect(self, var: bool) -> None:
         self.enable_bad_rect = var
 
+    def set_enable_fit_rect(self, var: bool) -> None:
+        self.enable_fit_rect = var
+
     def set_tile_size(self, tile_size: int) -> None:
         self.tile_size = tile_size 
 
@@ -123,6 +202,8 @@ class SettingsManager:
         return SettingsState(
             self.current_theme, 
             self.enable_bad_rect, 
-            self.tile_size
+            self.enable_fit_rect,
+            self.tile_size,
+            self.current_theme.get_palette()
         )
 
@@ -0,0 +1,120 @@
+# board.py
+
+from array import array
+from typing import Iterator, List, Tuple
+
+# offsets of each edge inside a cell's 4 entries of Board.edges
+N, E, S, W = 0, 1, 2, 3
+
+
+class Board:
+    """
+    Flat store for a grid of tiles.
+
+    Cell (i, j) has index i * num_cols + j. Its edges live at edges[4*idx:4*idx+4]
+    as int8 values, active[idx] says whether the cell holds a tile, and home[idx]
+    is the cell index the tile was generated for.
+    """
+
+    __slots__ = ("num_rows", "num_cols", "edges", "active", "home")
+
+    def __init__(self, num_rows: int, num_cols: int):
+        num_cells = num_rows * num_cols
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.edges = array("b", bytes(num_cells * 4))
+        self.active = bytearray(num_cells)
+        self.home = array("I", range(num_cells))
+
+    def index(self, i: int, j: int) -> int:
+        return i * self.num_cols + j
+
+    def tile(self, idx: int) -> Tuple[int, int, int, int]:
+        k = idx * 4
+        return tuple(self.edges[k:k + 4])
+
+    def set_tile(self, idx: int, tile: Tuple[int, int, int, int], home: int):
+        k = idx * 4
+        self.edges[k:k + 4] = array("b", tile)
+        self.active[idx] = 1
+        self.home[idx] = home
+
+    def swap(self, idx1: int, idx2: int):
+        k1, k2 = idx1 * 4, idx2 * 4
+        edges = self.edges
+        edges[k1:k1 + 4], edges[k2:k2 + 4] = edges[k2:k2 + 4], edges[k1:k1 + 4]
+        self.active[idx1], self.active[idx2] = self.active[idx2], self.active[idx1]
+        self.home[idx1], self.home[idx2] = self.home[idx2], self.home[idx1]
+
+    def copy(self) -> "Board":
+        other = Board.__new__(Board)
+        other.num_rows = self.num_rows
+        other.num_cols = self.num_cols
+        other.edges = array("b", self.edges)
+        other.active = bytearray(self.active)
+        other.home = array("I", self.home)
+        return other
+
+    def nbytes(self) -> int:
+        return (
+            len(self.edges) * self.edges.itemsize
+            + len(self.active)
+            + len(self.home) * self.home.itemsize
+        )
+
+    # grid[i][j] style access, for code that walks the board as rows of Blocks
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, i: int) -> List["Block"]:
+        if not 0 <= i < self.num_rows:
+            raise IndexError(i)
+        start = i * self.num_cols
+        return [Block(self, idx) for idx in range(start, start + self.num_cols)]
+
+    def __iter__(self) -> Iterator[List["Block"]]:
+        for i in range(self.num_rows):
+            yield self[i]
+
+
+class Block:
+    """Read-only view of one cell of a Board."""
+
+    __slots__ = ("board", "idx")
+
+    def __init__(self, board: Board, idx: int):
+        self.board = board
+        self.idx = idx
+
+    @property
+    def n(self) -> int:
+        return self.board.edges[self.idx * 4 + N]
+
+    @property
+    def e(self) -> int:
+        return self.board.edges[self.idx * 4 + E]
+
+    @property
+    def s(self) -> int:
+        return self.board.edges[self.idx * 4 + S]
+
+    @property
+    def w(self) -> int:
+        return self.board.edges[self.idx * 4 + W]
+
+    @property
+    def active(self) -> bool:
+        return bool(self.board.active[self.idx])
+
+    @property
+    def ci(self) -> int:
+        return self.board.home[self.idx] // self.board.num_cols
+
+    @property
+    def cj(self) -> int:
+        return self.board.home[self.idx] % self.board.num_cols
+
+    def __repr__(self) -> str:
+        return "Block(ci={}, cj={}, n={}, e={}, s={}, w={}, active={})".format(
+            self.ci, self.cj, self.n, self.e, self.s, self.w, self.active
+        )
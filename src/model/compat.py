@@ -0,0 +1,206 @@
+# compat.py
+#
+# Edge-compatibility index: which tiles fit a right-hand cell, and which
+# right-hand cells a tile fits. A tile fits a cell when each of its edges
+# matches the tile across that edge; empty cells, the board border and the
+# LHS do not constrain.
+
+from array import array
+from typing import Iterator, List, Tuple
+
+from model.board import Board, N, E, S, W
+
+OPPOSITE = (S, W, N, E)
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    # set bit positions, lowest first; string search keeps this linear on
+    # boards with thousands of cells
+    bits = bin(mask)[:1:-1]
+    idx = bits.find("1")
+    while idx >= 0:
+        yield idx
+        idx = bits.find("1", idx + 1)
+
+
+class CompatIndex:
+    """
+    Bitsets over tile IDs and over cells, kept as Python ints.
+
+    Tile IDs number the tiles when the index is built and follow them as
+    they move. tiles_with[side][value] holds the tiles showing value on
+    that side. For RHS cells, free[side] holds the cells with nothing
+    across that side and need[side][value] the cells whose neighbour
+    across it shows value. Either query is then at most 4 ANDs.
+
+    Swaps are reported with moved() and applied on the next query; only
+    the constraints of the cells around them change.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        num_rows, num_cols = board.num_rows, board.num_cols
+        num_cells = num_rows * num_cols
+        offset = num_cols // 2
+
+        # across[idx * 4 + side]: the RHS cell across that side, or -1;
+        # around[idx]: (neighbour, the neighbour's side facing idx)
+        self.across = array("i", [-1] * (num_cells * 4))
+        self.around: List[Tuple[Tuple[int, int], ...]] = []
+        self.rhs = 0
+        for idx in range(num_cells):
+            i, j = divmod(idx, num_cols)
+            if j < offset:
+                self.around.append(())
+                continue
+            self.rhs |= 1 << idx
+            k = idx * 4
+            if i > 0:
+                self.across[k + N] = idx - num_cols
+            if j + 1 < num_cols:
+                self.across[k + E] = idx + 1
+            if i + 1 < num_rows:
+                self.across[k + S] = idx + num_cols
+            if j > offset:
+                self.across[k + W] = idx - 1
+            self.around.append(tuple(
+                (self.across[k + side], OPPOSITE[side]) for side in (N, E, S, W) if self.across[k + side] >= 0
+            ))
+
+        # past max_pending unapplied swaps a rebuild is cheaper
+        self.pending: List[Tuple[int, int]] = []
+        self.max_pending = max(16, num_cells)
+        self.rebuild()
+
+    def rebuild(self):
+        board = self.board
+        edges = board.edges
+        active = board.active
+        num_cells = len(active)
+
+        self.pending.clear()
+        self.tile_id = array("i", [-1] * num_cells)
+        self.cell_of = array("i")
+        self.tiles_with = [{}, {}, {}, {}]
+        for idx in range(num_cells):
+            if not active[idx]:
+                continue
+            tid = len(self.cell_of)
+            self.tile_id[idx] = tid
+            self.cell_of.append(idx)
+            for side in (N, E, S, W):
+                by_value = self.tiles_with[side]
+                value = edges[idx * 4 + side]
+                by_value[value] = by_value.get(value, 0) | 1 << tid
+        self.all_tiles = (1 << len(self.cell_of)) - 1
+
+        # required[idx * 4 + side]: the value a tile in idx has to show on
+        # that side, or -1
+        self.required = array("b", [-1] * (num_cells * 4))
+        self.free = [self.rhs] * 4
+        self.need = [{}, {}, {}, {}]
+        for idx in iter_bits(self.rhs):
+            for nb, side in self.around[idx]:
+                if active[idx]:
+                    self.set_required(nb, side, edges[idx * 4 + OPPOSITE[side]])
+
+    def set_required(self, idx: int, side: int, value: int):
+        k = idx * 4 + side
+        old = self.required[k]
+        if old == value:
+            return
+        bit = 1 << idx
+        need = self.need[side]
+        if old < 0:
+            self.free[side] ^= bit
+        else:
+            need[old] ^= bit
+        if value < 0:
+            self.free[side] |= bit
+        else:
+            need[value] = need.get(value, 0) | bit
+        self.required[k] = value
+
+    def moved(self, idx1: int, idx2: int):
+        # called by the engine after every swap
+        if len(self.pending) <= self.max_pending:
+            self.pending.append((idx1, idx2))
+
+    def flush(self):
+        pending = self.pending
+        if not pending:
+            return
+        if len(pending) > self.max_pending:
+            self.rebuild()
+            return
+
+        tile_id = self.tile_id
+        cell_of = self.cell_of
+        touched = set()
+        for idx1, idx2 in pending:
+            t1, t2 = tile_id[idx1], tile_id[idx2]
+            tile_id[idx1], tile_id[idx2] = t2, t1
+            if t1 >= 0:
+                cell_of[t1] = idx2
+            if t2 >= 0:
+                cell_of[t2] = idx1
+            touched.add(idx1)
+            touched.add(idx2)
+        pending.clear()
+
+        edges = self.board.edges
+        active = self.board.active
+        for idx in touched:
+            for nb, side in self.around[idx]:
+                self.set_required(nb, side, edges[idx * 4 + OPPOSITE[side]] if active[idx] else -1)
+
+    def tiles_fitting(self, idx: int) -> int:
+        # tile IDs that fit RHS cell idx as its neighbours stand now
+        self.flush()
+        mask = self.all_tiles
+        k = idx * 4
+        for side in (N, E, S, W):
+            value = self.required[k + side]
+            if value >= 0:
+                mask &= self.tiles_with[side].get(value, 0)
+        return mask
+
+    def cells_fitting(self, tile: Tuple[int, int, int, int]) -> int:
+        # RHS cells a tile with these edges fits as the board stands now
+        self.flush()
+        mask = self.rhs
+        for side in (N, E, S, W):
+            mask &= self.free[side] | self.need[side].get(tile[side], 0)
+        return mask
+
+    def swap_targets(self, src: int) -> int:
+        # RHS cells the tile in src fits once swapped there. src itself is
+        # left out, and a neighbour of src gets the tile from that cell
+        # across from it after the swap, so those few are checked directly
+        board = self.board
+        if not board.active[src]:
+            return 0
+        tile = board.tile(src)
+        mask = self.cells_fitting(tile) & ~(1 << src)
+
+        edges = board.edges
+        required = self.required
+        for nb, facing in self.around[src]:
+            fits = True
+            for side in (N, E, S, W):
+                if side == facing:
+                    value = edges[nb * 4 + OPPOSITE[side]] if board.active[nb] else -1
+                else:
+                    value = required[nb * 4 + side]
+                if value >= 0 and tile[side] != value:
+                    fits = False
+                    break
+            if fits:
+                mask |= 1 << nb
+            else:
+                mask &= ~(1 << nb)
+        return mask
+
+    def tile_cell(self, tid: int) -> int:
+        self.flush()
+        return self.cell_of[tid]
@@ -0,0 +1,225 @@
+# difficulty.py
+#
+# Puzzle difficulty from solver measurements, rated in bulk across cores:
+#   python -m model.difficulty puzzles.tvxp --out ratings.jsonl
+#
+# The solver searches each puzzle until it has proven it unique or found a
+# second solution. Ratings are cached in sqlite by a hash of the sorted tile
+# multiset, so re-rating a corpus only searches puzzles not seen before.
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from model.generate import unpack_tiles
+from model.pack import FROM_HEX, MAGIC as PACK_MAGIC, PuzzlePack
+from model.solver import Solver
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".tetravex_ratings.sqlite")
+
+# search budget per puzzle; ratings that hit it are marked aborted
+RATE_MAX_NODES = 2_000_000
+
+# puzzles looked up in the cache and rated per round
+CHUNK = 1024
+
+
+@dataclass
+class Rating:
+    nodes: int       # tiles placed during the search
+    expanded: int    # candidate lists built after a placement
+    branches: int    # total length of those lists
+    single: int      # lists holding exactly one tile: forced placements
+    solutions: int   # 0, 1 or 2, where 2 means two or more
+    aborted: bool
+    max_nodes: Optional[int]
+    num_cells: int
+
+    @property
+    def branching(self) -> float:
+        return self.branches / self.expanded if self.expanded else 0.0
+
+    @property
+    def forced(self) -> float:
+        # share of placements the puzzle left no choice for
+        return self.single / self.expanded if self.expanded else 1.0
+
+    @property
+    def score(self) -> float:
+        # log2 of the search per cell: 0 when the solver never backtracked
+        return math.log2(max(self.nodes, self.num_cells) / self.num_cells)
+
+
+def canonical_key(size: int, packed: bytes) -> str:
+    # the same for every arrangement of the same tiles
+    tiles = sorted(packed[k:k + 4] for k in range(0, len(packed), 4))
+    digest = hashlib.blake2b(bytes((size,)), digest_size=16)
+    for tile in tiles:
+        digest.update(tile)
+    return digest.hexdigest()
+
+
+def rate(size: int, packed: bytes, max_nodes: Optional[int] = RATE_MAX_NODES) -> Rating:
+    solver = Solver(unpack_tiles(packed), size, size)
+    found = 0
+    for _ in solver.iter_solutions(max_nodes=max_nodes):
+        found += 1
+        if found == 2:
+            break
+    return Rating(
+        solver.nodes, solver.expanded, solver.branches, solver.single,
+        found, solver.aborted, max_nodes, size * size,
+    )
+
+
+def rate_job(job: Tuple[int, bytes, Optional[int]]) -> Rating:
+    # process pool entry point
+    return rate(*job)
+
+
+class RatingCache:
+    """
+    Ratings in sqlite, keyed by canonical_key.
+
+    An aborted rating only counts as known for budgets no larger than the
+    one it ran out of, so raising max_nodes re-rates those puzzles.
+    """
+
+    COLUMNS = ("nodes", "expanded", "branches", "single", "solutions", "aborted", "max_nodes", "num_cells")
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ratings (key TEXT PRIMARY KEY, {})".format(
+                ", ".join("{} INTEGER".format(column) for column in self.COLUMNS)
+            )
+        )
+        self.db.commit()
+
+    def get_many(self, keys: List[str], max_nodes: Optional[int] = RATE_MAX_NODES) -> Dict[str, Rating]:
+        found = {}
+        query = "SELECT key, {} FROM ratings WHERE key IN ({{}})".format(", ".join(self.COLUMNS))
+        # stay under sqlite's bound parameter limit
+        for k in range(0, len(keys), 500):
+            part = keys[k:k + 500]
+            for key, *values in self.db.execute(query.format(",".join("?" * len(part))), part):
+                rating = Rating(*values)
+                rating.aborted = bool(rating.aborted)
+                if rating.aborted and (max_nodes is None or (rating.max_nodes or 0) < max_nodes):
+                    continue
+                found[key] = rating
+        return found
+
+    def put_many(self, ratings: Dict[str, Rating]):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO ratings VALUES (?, {})".format(", ".join("?" * len(self.COLUMNS))),
+                ((key, *(getattr(r, column) for column in self.COLUMNS)) for key, r in ratings.items()),
+            )
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> "RatingCache":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def rate_all(
+    puzzles: Iterable[Tuple[int, bytes]],
+    cache: Optional[RatingCache] = None,
+    workers: Optional[int] = None,
+    max_nodes: Optional[int] = RATE_MAX_NODES,
+) -> Iterator[Tuple[str, Rating, bool]]:
+    # (key, rating, came from cache) per puzzle, in input order. Each chunk
+    # is looked up in the cache in one query; the misses, each distinct
+    # multiset once, are rated across a process pool and stored
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    puzzles = iter(puzzles)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = list(islice(puzzles, CHUNK))
+            if not chunk:
+                return
+            keys = [canonical_key(size, packed) for size, packed in chunk]
+            known = cache.get_many(keys, max_nodes) if cache is not None else {}
+
+            jobs = {}
+            for key, (size, packed) in zip(keys, chunk):
+                if key not in known and key not in jobs:
+                    jobs[key] = (size, packed, max_nodes)
+            rated = dict(zip(jobs, pool.map(rate_job, jobs.values(), chunksize=max(1, len(jobs) // (4 * workers)))))
+            if cache is not None and rated:
+                cache.put_many(rated)
+
+            for key in keys:
+                if key in known:
+                    yield key, known[key], True
+                else:
+                    yield key, rated[key], False
+
+
+def iter_puzzles(path: str) -> Iterator[Tuple[int, bytes]]:
+    # (size, packed) from a puzzle pack or a model.generate text file
+    with open(path, "rb") as f:
+        is_pack = f.read(len(PACK_MAGIC)) == PACK_MAGIC
+    if is_pack:
+        with PuzzlePack(path) as pack:
+            for n in range(len(pack)):
+                yield pack[n]
+        return
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                size_text, digits = line.split()
+                yield int(size_text), digits.encode("ascii").translate(FROM_HEX)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate Tetravex puzzle difficulty from solver measurements.")
+    parser.add_argument("path", help="puzzle pack or text file from model.generate")
+    parser.add_argument("--out", default="-", help="JSON lines file, one line per puzzle, - for stdout")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="sqlite ratings cache")
+    parser.add_argument("--no-cache", action="store_true", help="rate every puzzle, store nothing")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-nodes", type=int, default=RATE_MAX_NODES, help="solver budget per puzzle")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else RatingCache(args.cache)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    total = hits = 0
+    try:
+        for n, (key, rating, cached) in enumerate(rate_all(iter_puzzles(args.path), cache, args.workers, args.max_nodes)):
+            total += 1
+            hits += cached
+            row = {"index": n, "key": key, **asdict(rating)}
+            row.update(branching=round(rating.branching, 3), forced=round(rating.forced, 3), score=round(rating.score, 3))
+            out.write(json.dumps(row) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+
+    print("{} puzzles, {} from cache".format(total, hits), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,20 @@
 # engine.py 
 
 from dataclasses import dataclass 
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+import functools
 import random 
+import threading
+from array import array
 
-@dataclass
-class Block:
-    ci: int
-    cj: int
-    n: int
-    e: int
-    s: int
-    w: int
-    active: bool
+from model.board import Block, Board, N, E, S, W
+from model.solver import Solver, Tile
+from model.zobrist import EMPTY, MASK, cell_key, tile_key
+
+# compat, generate and parallel are imported where they are first used;
+# the engine is imported by every batch worker and by the app at startup
+if TYPE_CHECKING:
+    from model.compat import CompatIndex
 
 @dataclass 
 class Move:
@@ -25,7 +27,70 @@ class Move:
 class BoardState:
     num_rows: int
     num_cols: int
-    grid: List[List["Block"]]
+    grid: "Board"
+
+@functools.lru_cache(maxsize=8)
+def neighbour_pairs(num_rows: int, num_cols: int) -> Tuple[Tuple[Tuple[int, int, int, int], ...], ...]:
+    # per cell, the adjacent RHS cell pairs that include it as (a, b, ka, kb):
+    # a before b, and ka, kb the indexes in Board.edges of the two edges
+    # that have to match. LHS cells get no pairs
+    offset = num_cols // 2
+    out = []
+    for idx in range(num_rows * num_cols):
+        i, j = divmod(idx, num_cols)
+        pairs = []
+        if j >= offset:
+            if i > 0:
+                pairs.append((idx - num_cols, idx, (idx - num_cols) * 4 + S, idx * 4 + N))
+            if i + 1 < num_rows:
+                pairs.append((idx, idx + num_cols, idx * 4 + S, (idx + num_cols) * 4 + N))
+            if j > offset:
+                pairs.append((idx - 1, idx, (idx - 1) * 4 + E, idx * 4 + W))
+            if j + 1 < num_cols:
+                pairs.append((idx, idx + 1, idx * 4 + E, (idx + 1) * 4 + W))
+        out.append(tuple(pairs))
+    return tuple(out)
+
+
+class SearchAborted(Exception):
+    """
+    Raised by iter_solutions when max_nodes ran out or stop was set before
+    the search was complete; found is how many solutions came before.
+    """
+
+    def __init__(self, found: int):
+        super().__init__("search stopped after {} solutions".format(found))
+        self.found = found
+
+
+def iter_solutions(
+    board: "Board",
+    limit: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+) -> Iterator[List[Tile]]:
+    # every arrangement of the board's tiles that solves the RHS grid, as a
+    # row-major list of RHS tiles, yielded as the search finds them.
+    # Arrangements that only swap identical tiles count once. The search
+    # keeps a fixed amount of state however many solutions there are, so
+    # stopping early or counting costs nothing extra; limit stops after that
+    # many solutions, max_nodes and stop bound the search as in Solver.
+    # Running out of either raises SearchAborted, so a cut short search
+    # never passes for a complete one
+    if limit is not None and limit <= 0:
+        return
+    num_cells = board.num_rows * board.num_cols
+    tiles = [board.tile(idx) for idx in range(num_cells) if board.active[idx]]
+    solver = Solver(tiles, board.num_rows, board.num_cols // 2)
+    count = 0
+    for solution in solver.iter_solutions(None, max_nodes, stop):
+        yield solution
+        count += 1
+        if count == limit:
+            return
+    if solver.aborted:
+        raise SearchAborted(count)
+
 
 class Engine:
     def __init__(self):
@@ -33,36 +98,113 @@ class Engine:
         num_rows = size
         num_cols = size * 2
 
-        self.grid = [[ Block(i, j+size, 0, 0, 0, 0, False) for j in range(num_cols)] for i in range(num_rows)]
+        self.set_board(Board(num_rows, num_cols))
+
+    @property
+    def grid(self) -> "Board":
+        # rows of Block views, indexable as grid[i][j]
+        return self.board
+
+    def new_game(self, size: int, rng: Optional[random.Random] = None):
+        # rng defaults to the global random module
+        from model.generate import solved_tiles
 
-    def new_game(self, size: int):
+        rng = rng or random
+        self.load_tiles(size, solved_tiles(size, rng), rng)
+
+    def load_tiles(self, size: int, tiles: List[Tuple[int, int, int, int]], rng: Optional[random.Random] = None):
+        # tiles are in solution order, row by row; they are dealt onto the
+        # LHS in shuffled order and remember their solved RHS cell
+        rng = rng or random
         num_rows = size
         num_cols = size * 2
+
+        homes = [i * num_cols + j + size for i in range(size) for j in range(size)]
+        order = list(range(size * size))
+        rng.shuffle(order)
         
-        self.grid = [[ Block(i, j + size, 0, 0, 0, 0, False) for j in range(num_cols)] for i in range(num_rows)]
-
-        blocks = []
-        for i in range(size):
-            for j in range(size):
-                b = self.grid[i][j] 
-                b.n, b.e, b.s, b.w = [random.randint(0, 9) for _ in range(4)]
-                b.active = True
-                
-                if i > 0:
-                    a = self.grid[i-1][j]
-                    b.n = a.s
-                if j > 0:
-                    a = self.grid[i][j-1]
-                    b.w = a.e
-                
-                blocks.append(b)
-
-        random.shuffle(blocks)
-        
-        for idx, b in enumerate(blocks):
+        board = Board(num_rows, num_cols)
+        for idx, k in enumerate(order):
             i = idx // size 
             j = idx % size
-            self.grid[i][j] = b
+            board.set_tile(board.index(i, j), tiles[k], homes[k])
+        self.set_board(board)
+
+    def set_board(self, board: "Board"):
+        # tile codes and hashes take edge values as 4 bit nibbles
+        edges = board.edges
+        if edges and not (0 <= min(edges) and max(edges) <= 15):
+            for idx in range(len(board.active)):
+                if board.active[idx] and not all(0 <= v <= 15 for v in board.tile(idx)):
+                    raise ValueError("edge values must be 0..15, cell {} has {}".format(idx, board.tile(idx)))
+        self.board = board
+
+        # live mismatch state for the RHS grid, kept current by make_move:
+        # bad_edges counts adjacent active pairs whose edges differ,
+        # bad_count[idx] counts those pairs touching a cell,
+        # wrong holds the coords of cells with bad_count > 0
+        num_cells = board.num_rows * board.num_cols
+        self.bad_edges = 0
+        self.bad_count = bytearray(num_cells)
+        self.wrong = set()
+        self.empty_rhs = 0
+
+        self.neighbours = neighbour_pairs(board.num_rows, board.num_cols)
+
+        # edge-compatibility index, built on the first fit query
+        self.compat: Optional["CompatIndex"] = None
+
+        offset = board.num_cols // 2
+        for idx in range(num_cells):
+            if idx % board.num_cols < offset:
+                continue
+            if not board.active[idx]:
+                self.empty_rhs += 1
+            for pair in self.neighbours[idx]:
+                if pair[0] == idx:
+                    self.count_pair(pair, 1)
+
+        # Zobrist hashes, built on the first read
+        self.codes: Optional[array] = None
+
+    def init_hashes(self):
+        # 64-bit Zobrist hashes, then kept current by make_move. zobrist
+        # xors a key per (cell, tile). canonical_hash uses the same keys on
+        # the RHS but adds up one key per LHS tile, so it ignores the order
+        # tiles are staged in on the left. codes[idx] is the 16 bit tile
+        # code (n, e, s, w nibbles) in each cell
+        board = self.board
+        edges = board.edges
+        offset = board.num_cols // 2
+        tiles = zip(edges[0::4], edges[1::4], edges[2::4], edges[3::4])
+        self.codes = array("I", [
+            n << 12 | e << 8 | s << 4 | w if active else EMPTY
+            for (n, e, s, w), active in zip(tiles, board.active)
+        ])
+        self.board_hash = 0
+        self.rhs_hash = 0
+        self.lhs_hash = 0
+        for idx, code in enumerate(self.codes):
+            if code == EMPTY:
+                continue
+            key = cell_key(idx, code)
+            self.board_hash ^= key
+            if idx % board.num_cols >= offset:
+                self.rhs_hash ^= key
+            else:
+                self.lhs_hash += tile_key(code)
+
+    @property
+    def zobrist(self) -> int:
+        if self.codes is None:
+            self.init_hashes()
+        return self.board_hash
+
+    @property
+    def canonical_hash(self) -> int:
+        if self.codes is None:
+            self.init_hashes()
+        return (self.rhs_hash ^ self.lhs_hash) & MASK
         
     def block_say(self, b):
         if b.active:
@@ -77,96 +219,177 @@ class Engine:
             print()
     
     def make_move(self, move: "Move"):
-        i1, j1, i2, j2 = move.i1, move.j1, move.i2, move.j2  
-        self.grid[i1][j1], self.grid[i2][j2] = self.grid[i2][j2], self.grid[i1][j1] 
+        board = self.board
+        self.swap_cells(board.index(move.i1, move.j1), board.index(move.i2, move.j2))
+
+    def swap_cells(self, idx1: int, idx2: int):
+        if idx1 == idx2:
+            return
+        board = self.board
+
+        # only the pairs around the two swapped cells can change; they
+        # share one when the cells are neighbours
+        pairs = self.neighbours[idx1] + self.neighbours[idx2]
+        if pairs and abs(idx1 - idx2) in (1, board.num_cols):
+            pairs = set(pairs)
+        for pair in pairs:
+            self.count_pair(pair, -1)
+
+        active = board.active
+        offset = board.num_cols // 2
+        if active[idx1] != active[idx2]:
+            if idx1 % board.num_cols >= offset:
+                self.empty_rhs += active[idx1] - active[idx2]
+            if idx2 % board.num_cols >= offset:
+                self.empty_rhs += active[idx2] - active[idx1]
+
+        board.swap(idx1, idx2)
+
+        for pair in pairs:
+            self.count_pair(pair, 1)
+
+        # hashes, once built; lhs_hash is a plain sum of the LHS tile keys,
+        # masked when read
+        codes = self.codes
+        if codes is not None and codes[idx1] != codes[idx2]:
+            c1, c2 = codes[idx1], codes[idx2]
+            codes[idx1], codes[idx2] = c2, c1
+            delta1 = cell_key(idx1, c1) ^ cell_key(idx1, c2)
+            delta2 = cell_key(idx2, c2) ^ cell_key(idx2, c1)
+            self.board_hash ^= delta1 ^ delta2
+            left1 = idx1 % board.num_cols < offset
+            if left1 != (idx2 % board.num_cols < offset):
+                # one tile crosses over; the other side's key moves with it
+                lhs, rhs = (idx1, idx2) if left1 else (idx2, idx1)
+                self.rhs_hash ^= delta2 if left1 else delta1
+                self.lhs_hash += tile_key(codes[lhs]) - tile_key(codes[rhs])
+            elif not left1:
+                self.rhs_hash ^= delta1 ^ delta2
+
+        if self.compat is not None:
+            self.compat.moved(idx1, idx2)
+
+    def count_pair(self, pair: Tuple[int, int, int, int], step: int):
+        a, b, ka, kb = pair
+        board = self.board
+        edges = board.edges
+        if edges[ka] == edges[kb] or not (board.active[a] and board.active[b]):
+            return
+
+        self.bad_edges += step
+        bad_count = self.bad_count
+        for idx in (a, b):
+            bad_count[idx] += step
+            if bad_count[idx] == (1 if step > 0 else 0):
+                coord = divmod(idx, board.num_cols)
+                if step > 0:
+                    self.wrong.add(coord)
+                else:
+                    self.wrong.discard(coord)
 
     def get_hint_coords(self) -> List[Tuple[int, int]]:
-        current_board_state = self.get_state()
-        num_rows = current_board_state.num_rows
-        num_cols = current_board_state.num_cols 
+        board = self.board
+        num_cols = board.num_cols
         
-        for i, row in enumerate(self.grid):
-            for j, b in enumerate(row):
-                if b.active and (i != b.ci or j != b.cj):
-                    # find the block currently at (b.ci, b.cj)
-                    target = self.grid[b.ci][b.cj]
-                    return [(i, j), (b.ci, b.cj)]
+        for idx in range(board.num_rows * num_cols):
+            home = board.home[idx]
+            if board.active[idx] and idx != home:
+                return [divmod(idx, num_cols), divmod(home, num_cols)]
         return []
         
     def get_wrong_coords(self) -> List[Tuple[int, int]]:
-        wrong_coords = []
-        
-        directions = [ [-1, 0], [1, 0], [0, 1], [0, -1] ]
-        block_attrs = ['n', 's', 'e', 'w']
-        other_attrs = ['s', 'n', 'w', 'e']
-        
-        num_rows = len(self.grid)
-        num_cols = len(self.grid[0])
-        offset = num_cols // 2 
-        
-        # loop over grid on RHS
-        for i in range(num_rows):
-            for j in range(offset, num_cols):
-                for direction, block_attr, other_attr in zip(directions, block_attrs, other_attrs):
-                    if not self.grid[i][j].active:
-                        continue
-
-                    i2 = i + direction[0]
-                    j2 = j + direction[1]
-                    
-                    if (i2 < 0 or i2 >= num_rows):
-                        continue
-                    if (j2 < offset or j2 >= num_cols):
-                        continue
-                    
-                    if not self.grid[i2][j2].active:
-                        continue
-
-                    block_edge = getattr(self.grid[i][j], block_attr)
-                    other_edge = getattr(self.grid[i2][j2], other_attr)
-                    
-                    if (block_edge != other_edge):
-                        coord = (i, j)
-                        wrong_coords.append(coord)
-
-        return wrong_coords 
+        return list(self.wrong)
+
+    def fitting_cells(self) -> List[int]:
+        # RHS cells whose tile matches at least one active neighbour and
+        # mismatches none; a tile with no active neighbours fits nothing yet
+        active = self.board.active
+        bad_count = self.bad_count
+        out = []
+        for idx, pairs in enumerate(self.neighbours):
+            if not active[idx] or bad_count[idx]:
+                continue
+            if any(active[b if a == idx else a] for a, b, _, _ in pairs):
+                out.append(idx)
+        return out
+
+    def fit_index(self) -> "CompatIndex":
+        if self.compat is None:
+            from model.compat import CompatIndex
+
+            self.compat = CompatIndex(self.board)
+        return self.compat
+
+    def get_fit_coords(self, i: int, j: int) -> List[Tuple[int, int]]:
+        # RHS cells the tile at (i, j) would match every neighbour in if
+        # swapped there; empty for an empty cell
+        from model.compat import iter_bits
+
+        num_cols = self.board.num_cols
+        mask = self.fit_index().swap_targets(i * num_cols + j)
+        return [divmod(idx, num_cols) for idx in iter_bits(mask)]
 
     def is_solved(self) -> bool:
-        directions = [ [-1, 0], [1, 0], [0, 1], [0, -1] ]
-        block_attrs = ['n', 's', 'e', 'w']
-        other_attrs = ['s', 'n', 'w', 'e']
-        
-        num_rows = len(self.grid)
-        num_cols = len(self.grid[0])
-        offset = num_cols // 2 
-        
-        # loop over grid on RHS
-        for i in range(num_rows):
-            for j in range(offset, num_cols):
-                for direction, block_attr, other_attr in zip(directions, block_attrs, other_attrs):
-                    if not self.grid[i][j].active:
-                        return False
-
-                    i2 = i + direction[0]
-                    j2 = j + direction[1]
-                    
-                    if (i2 < 0 or i2 >= num_rows):
-                        continue
-                    if (j2 < offset or j2 >= num_cols):
-                        continue
-
-                    block_edge = getattr(self.grid[i][j], block_attr)
-                    other_edge = getattr(self.grid[i2][j2], other_attr)
-
-                    if (block_edge != other_edge):
-                        return False
-
-        return True
+        return self.empty_rhs == 0 and self.bad_edges == 0
     
+    def iter_solutions(self, limit: Optional[int] = None, max_nodes: Optional[int] = None) -> Iterator[List[Tile]]:
+        return iter_solutions(self.board, limit, max_nodes)
+
+    def solve(
+        self,
+        max_nodes: Optional[int] = None,
+        keep_fitting: bool = False,
+        stop: Optional[threading.Event] = None,
+        workers: int = 1,
+    ) -> Optional[Dict[Tuple[int, int], Tuple[int, int]]]:
+        # maps each right-hand coord to the current coord of a tile that belongs there.
+        # keep_fitting only looks for solutions that leave every RHS tile
+        # in fitting_cells where it is.
+        # None when there is no solution, max_nodes ran out or stop was set.
+        # workers > 1 splits the search over that many processes, with
+        # max_nodes then bounding each part
+        board = self.board
+        num_rows = board.num_rows
+        num_cols = board.num_cols
+        offset = num_cols // 2
+
+        # current coords of every active tile, grouped by edges
+        pool: Dict[Tuple[int, int, int, int], List[Tuple[int, int]]] = {}
+        for idx in range(num_rows * num_cols):
+            if board.active[idx]:
+                pool.setdefault(board.tile(idx), []).append(divmod(idx, num_cols))
+
+        fixed = {}
+        if keep_fitting:
+            for idx in self.fitting_cells():
+                i, j = divmod(idx, num_cols)
+                fixed[i * offset + j - offset] = board.tile(idx)
+
+        tiles = [tile for tile, coords in pool.items() for _ in coords]
+        if workers > 1:
+            from model.parallel import solve_parallel
+
+            solution = solve_parallel(tiles, num_rows, offset, fixed, workers, max_nodes, stop)
+        else:
+            solution = Solver(tiles, num_rows, offset).solve(fixed, max_nodes, stop)
+        if solution is None:
+            return None
+
+        targets = {}
+        for idx, tile in enumerate(solution):
+            targets[(idx // offset, idx % offset + offset)] = tile
+
+        # keep tiles that are already in place where they are
+        result = {}
+        for coord, tile in targets.items():
+            if coord in pool[tile]:
+                pool[tile].remove(coord)
+                result[coord] = coord
+        for coord, tile in targets.items():
+            if coord not in result:
+                result[coord] = pool[tile].pop()
+        return result
+
     def get_state(self) -> "BoardState":
-        num_rows = len(self.grid)
-        num_cols = len(self.grid[0])
-        # hint_coords =
-        # wrong_coords =
-        return BoardState(num_rows, num_cols, self.grid)
+        return BoardState(self.board.num_rows, self.board.num_cols, self.board)
 
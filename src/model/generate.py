@@ -0,0 +1,261 @@
+# generate.py
+#
+# Headless puzzle generator:
+#   python -m model.generate --size 8 --count 1000000 --seed 42 --out puzzles.txt
+
+import argparse
+import os
+import random
+import sys
+from array import array
+from collections import deque
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from model.pack import HEX_DIGITS, PackWriter, pack_edges
+from model.solver import Solver
+from model.zobrist import multiset_hash
+
+Tile = Tuple[int, int, int, int]
+
+NUM_VALUES = 10
+BATCH_SIZE = 1024
+
+# search budget per uniqueness check; puzzles that exhaust it are rejected.
+# 6x6 checks take ~10k nodes, 8x8 ones up to a few million
+UNIQUE_MAX_NODES = 2_000_000
+
+
+def random_values(rng: random.Random, k: int, num_values: int = NUM_VALUES) -> bytes:
+    # k uniform values in range(num_values) from random bytes: bytes past the
+    # largest multiple of num_values are dropped, the rest reduced modulo
+    # num_values, all with C-level bytes operations
+    limit = 256 - 256 % num_values
+    reject = bytes(range(limit, 256))
+    table = bytes(b % num_values for b in range(256))
+
+    out = b""
+    while len(out) < k:
+        need = k - len(out)
+        raw = rng.randbytes(need + need // 8 + 16)
+        out += raw.translate(table, reject)
+    return out[:k]
+
+
+def solved_tiles(size: int, rng: random.Random, num_values: int = NUM_VALUES) -> List[Tile]:
+    # a random solved board, tiles listed row-major
+    return unpack_tiles(next(solved_batches(size, 1, rng, num_values))[0])
+
+
+def solved_batches(
+    size: int,
+    count: int,
+    rng: random.Random,
+    num_values: int = NUM_VALUES,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[List[bytes]]:
+    # Yields lists of up to batch_size solved boards, each packed as n, e, s, w
+    # bytes per tile, row-major. A board is fixed by its (size + 1) x size
+    # horizontal edge values and size x (size + 1) vertical ones, so a batch
+    # takes all of its values from one draw and is assembled with slices
+    h_count = (size + 1) * size
+    per_board = 2 * h_count
+
+    done = 0
+    while done < count:
+        n = min(batch_size, count - done)
+        flat = random_values(rng, n * per_board, num_values)
+
+        batch = []
+        for b in range(n):
+            h = b * per_board
+            v = h + h_count
+            packed = bytearray(4 * size * size)
+            for i in range(size):
+                # row i: n from horizontal line i, s from line i + 1,
+                # w and e from the vertical values either side of each tile
+                row = packed[4 * i * size:4 * (i + 1) * size]
+                verticals = flat[v + i * (size + 1):v + (i + 1) * (size + 1)]
+                row[0::4] = flat[h + i * size:h + (i + 1) * size]
+                row[1::4] = verticals[1:]
+                row[2::4] = flat[h + (i + 1) * size:h + (i + 2) * size]
+                row[3::4] = verticals[:-1]
+                packed[4 * i * size:4 * (i + 1) * size] = row
+            batch.append(bytes(packed))
+
+        done += n
+        yield batch
+
+
+def unpack_tiles(packed: bytes) -> List[Tile]:
+    return [tuple(packed[k:k + 4]) for k in range(0, len(packed), 4)]
+
+
+def count_solutions(size: int, packed: bytes, limit: int = 2, max_nodes: Optional[int] = None) -> Optional[int]:
+    # number of distinct arrangements, counting at most limit of them.
+    # None when max_nodes ran out before the count was settled
+    solver = Solver(unpack_tiles(packed), size, size)
+    found = 0
+    for _ in solver.iter_solutions(max_nodes=max_nodes):
+        found += 1
+        if found == limit:
+            return found
+    return None if solver.aborted else found
+
+
+def is_unique(job: Tuple[int, bytes, Optional[int]]) -> bool:
+    # process pool entry point
+    size, packed, max_nodes = job
+    return count_solutions(size, packed, 2, max_nodes) == 1
+
+
+def unique_batches(
+    size: int,
+    count: int,
+    rng: random.Random,
+    num_values: int = NUM_VALUES,
+    workers: Optional[int] = None,
+    max_nodes: Optional[int] = UNIQUE_MAX_NODES,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[List[bytes]]:
+    # Like solved_batches, but keeps only boards with exactly one solution.
+    # Candidates are checked across a process pool with a bounded number in
+    # flight and consumed in submission order, so the output for a seed does
+    # not depend on the number of workers
+    # imported here: multiprocessing is slow to import, and the engine pulls
+    # in this module on every startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    candidates = chain.from_iterable(solved_batches(size, sys.maxsize, rng, num_values, batch_size))
+    pending = deque()
+    batch = []
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while done < count:
+                while len(pending) < 4 * workers:
+                    packed = next(candidates)
+                    pending.append((packed, pool.submit(is_unique, (size, packed, max_nodes))))
+
+                packed, future = pending.popleft()
+                if not future.result():
+                    continue
+                batch.append(packed)
+                done += 1
+                if len(batch) == batch_size or done == count:
+                    yield batch
+                    batch = []
+        finally:
+            # also when the caller stops early, e.g. distinct_batches
+            for _, future in pending:
+                future.cancel()
+
+
+def puzzle_hash(packed: bytes) -> int:
+    # 64-bit Zobrist hash of the tile multiset, the same for every
+    # arrangement of the same tiles. Nibble packing turns each tile into its
+    # 16 bit code (n, e, s, w), big-endian
+    codes = array("H", pack_edges(packed))
+    if sys.byteorder == "little":
+        codes.byteswap()
+    return multiset_hash(codes)
+
+
+def distinct_batches(batches: Iterable[List[bytes]], count: int) -> Iterator[List[bytes]]:
+    # Drops puzzles with the same tiles as an earlier one, keeping only 8
+    # bytes per puzzle seen, until count are through. Stops short when a
+    # whole batch brings nothing new, as the supply has run dry
+    seen = set()
+    done = 0
+    for batch in batches:
+        fresh = []
+        for packed in batch:
+            key = puzzle_hash(packed)
+            if key not in seen:
+                seen.add(key)
+                fresh.append(packed)
+        if not fresh:
+            print("only {} distinct puzzles found".format(done), file=sys.stderr)
+            return
+        fresh = fresh[:count - done]
+        done += len(fresh)
+        yield fresh
+        if done == count:
+            return
+
+
+def format_puzzle(size: int, packed: bytes) -> str:
+    # one line per puzzle: size, then 4 hex digits (n, e, s, w) per tile in
+    # solution order. Shuffling happens when a puzzle is loaded into a game
+    return "{} {}\n".format(size, packed.translate(HEX_DIGITS).decode("ascii"))
+
+
+def parse_puzzle(line: str) -> Tuple[int, List[Tile]]:
+    size_text, digits = line.split()
+    size = int(size_text)
+    tiles = unpack_tiles(bytes(int(c, 16) for c in digits))
+    if len(tiles) != size * size:
+        raise ValueError("expected {} tiles, got {}".format(size * size, len(tiles)))
+    return size, tiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Tetravex puzzles without a display.")
+    parser.add_argument("--size", type=int, default=3, help="board size (size x size tiles)")
+    parser.add_argument("--count", type=int, default=1, help="number of puzzles")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("--values", type=int, default=NUM_VALUES, help="distinct edge values (max 16)")
+    parser.add_argument("--out", default="-", help="output file, - for stdout")
+    parser.add_argument(
+        "--format", choices=("text", "pack"), default="text",
+        help="one text line per puzzle, or a binary puzzle pack (see model.pack)",
+    )
+    parser.add_argument("--unique", action="store_true", help="keep only puzzles with exactly one solution")
+    parser.add_argument(
+        "--distinct", action="store_true",
+        help="drop puzzles with the same tiles as an earlier one",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="processes for --unique (default: all cores)")
+    parser.add_argument(
+        "--max-nodes", type=int, default=UNIQUE_MAX_NODES,
+        help="solver budget per --unique check; puzzles that exceed it are dropped",
+    )
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.values <= 16:
+        parser.error("--values must be between 1 and 16")
+    if args.size < 1:
+        parser.error("--size must be positive")
+
+    if args.format == "pack" and args.out == "-":
+        parser.error("--format pack needs an --out file")
+
+    rng = random.Random(args.seed)
+    # with --distinct, draw until enough distinct puzzles came through
+    count = sys.maxsize if args.distinct else args.count
+    if args.unique:
+        batches = unique_batches(args.size, count, rng, args.values, args.workers, args.max_nodes)
+    else:
+        batches = solved_batches(args.size, count, rng, args.values)
+    if args.distinct:
+        batches = distinct_batches(batches, args.count)
+
+    if args.format == "pack":
+        with PackWriter(args.out) as writer:
+            for batch in batches:
+                for packed in batch:
+                    writer.add(args.size, packed)
+        return
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        for batch in batches:
+            out.writelines(format_puzzle(args.size, packed) for packed in batch)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
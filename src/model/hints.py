@@ -0,0 +1,178 @@
+# hints.py
+#
+# Solver-backed hints. A HintPlan is a full solution for the tiles as they
+# lie now; the HintWorker computes plans for board snapshots in a separate
+# process, so neither the Tk thread nor the GIL it needs waits on the solver.
+
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from model.board import Board
+from model.engine import Engine
+
+Coord = Tuple[int, int]
+
+# search budget per solve; past it the caller falls back to home-cell hints
+HINT_MAX_NODES = 300_000
+
+# searches with more cells left to fill than this rarely finish within
+# HINT_MAX_NODES, so they are not started
+HINT_MAX_CELLS = 49
+
+
+class HintPlan:
+    """
+    Target RHS coord -> current coord of the tile that goes there.
+
+    A swap only relabels where tiles are, so swap() keeps the plan valid
+    after any move, including moves the player makes by hand.
+    """
+
+    def __init__(self, targets: Dict[Coord, Coord]):
+        self.source = dict(targets)
+        self.target = {src: dst for dst, src in targets.items()}
+        self.order = sorted(targets)
+
+    @classmethod
+    def from_homes(cls, board: Board) -> "HintPlan":
+        # the arrangement the tiles were generated in, always a solution
+        num_cols = board.num_cols
+        return cls({
+            divmod(board.home[idx], num_cols): divmod(idx, num_cols)
+            for idx in range(board.num_rows * num_cols)
+            if board.active[idx]
+        })
+
+    def swap(self, a: Coord, b: Coord):
+        ta = self.target.pop(a, None)
+        tb = self.target.pop(b, None)
+        if ta is not None:
+            self.source[ta] = b
+            self.target[b] = ta
+        if tb is not None:
+            self.source[tb] = a
+            self.target[a] = tb
+
+    def next_move(self) -> List[Coord]:
+        # [from, to] for the first target, row by row, that holds the wrong
+        # tile; [] once every tile is home
+        for dst in self.order:
+            src = self.source[dst]
+            if src != dst:
+                return [src, dst]
+        return []
+
+
+def solve_plan(
+    board: Board,
+    max_nodes: Optional[int] = HINT_MAX_NODES,
+    stop: Optional[threading.Event] = None,
+) -> Optional[HintPlan]:
+    # first try to keep every RHS tile that already fits, then any solution
+    engine = Engine()
+    engine.set_board(board)
+    num_cells = board.num_rows * (board.num_cols // 2)
+    fitting = len(engine.fitting_cells())
+    for keep_fitting in (True, False):
+        if num_cells - (fitting if keep_fitting else 0) > HINT_MAX_CELLS:
+            continue
+        targets = engine.solve(max_nodes, keep_fitting, stop)
+        if targets is not None:
+            return HintPlan(targets)
+        if stop is not None and stop.is_set():
+            return None
+    return None
+
+
+# set in the hint process by init_worker
+STOP = None
+
+
+def init_worker(stop):
+    global STOP
+    STOP = stop
+
+
+def solve_job(board: Board, max_nodes: Optional[int]) -> Optional[HintPlan]:
+    # process pool entry point
+    return solve_plan(board, max_nodes, STOP)
+
+
+class HintWorker:
+    """
+    Computes hint plans in a child process, fed by a background thread.
+
+    submit() hands over a board snapshot tagged with a generation number and
+    cancels the search in progress through a shared event. Results arrive
+    on self.results as (generation, plan or None) for the Tk thread to
+    poll; cancelled searches post nothing. The process is started by the
+    thread on the first submit.
+    """
+
+    def __init__(self, max_nodes: Optional[int] = HINT_MAX_NODES):
+        self.max_nodes = max_nodes
+        self.results: "queue.Queue[Tuple[int, Optional[HintPlan]]]" = queue.Queue()
+        self.pending: Optional[Tuple[int, Board]] = None
+        self.stop = None
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="hints", daemon=True)
+        self.thread.start()
+
+    def submit(self, generation: int, board: Board):
+        with self.cond:
+            if self.stop is not None:
+                self.stop.set()
+            self.pending = (generation, board)
+            self.cond.notify_all()
+
+    def run(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = None
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    break
+                generation, board = self.pending
+                self.pending = None
+                if pool is None:
+                    # never fork: this thread runs beside Tk's, and a forked
+                    # child would inherit whatever locks those held
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    context = multiprocessing.get_context(method)
+                    self.stop = context.Event()
+                    pool = ProcessPoolExecutor(1, mp_context=context,
+                                               initializer=init_worker, initargs=(self.stop,))
+                # the previous search has returned by now
+                self.stop.clear()
+
+            try:
+                plan = pool.submit(solve_job, board, self.max_nodes).result()
+            except BrokenProcessPool:
+                # the process died; start a fresh one for the next board
+                pool.shutdown(wait=False)
+                pool = None
+                plan = None
+            except Exception:
+                # the solve itself failed; the caller falls back to home hints
+                plan = None
+            with self.cond:
+                if not self.stop.is_set():
+                    self.results.put((generation, plan))
+
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            if self.stop is not None:
+                self.stop.set()
+            self.cond.notify_all()
+        self.thread.join(1.0)
@@ -0,0 +1,54 @@
+# history.py
+
+from array import array
+from typing import Optional, Tuple
+
+
+class MoveLog:
+    """
+    Undo/redo history of swaps, packed as pairs of cell indices.
+
+    Entries before cursor are done, the ones after it undone. A swap is its
+    own inverse, so undo and redo both hand back the pair to swap again.
+    Each move takes 4 bytes, which limits boards to 65536 cells.
+    """
+
+    def __init__(self):
+        self.cells = array("H")
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.cells) // 2
+
+    def clear(self):
+        del self.cells[:]
+        self.cursor = 0
+
+    def record(self, idx1: int, idx2: int):
+        # a new move drops whatever was undone
+        if self.cursor < len(self):
+            del self.cells[2 * self.cursor:]
+        self.cells.append(idx1)
+        self.cells.append(idx2)
+        self.cursor += 1
+
+    def undo(self) -> Optional[Tuple[int, int]]:
+        if self.cursor == 0:
+            return None
+        self.cursor -= 1
+        k = 2 * self.cursor
+        return self.cells[k], self.cells[k + 1]
+
+    def redo(self) -> Optional[Tuple[int, int]]:
+        if self.cursor == len(self):
+            return None
+        k = 2 * self.cursor
+        self.cursor += 1
+        return self.cells[k], self.cells[k + 1]
+
+    def done(self) -> array:
+        # the moves that lead to the current position, oldest first
+        return self.cells[:2 * self.cursor]
+
+    def nbytes(self) -> int:
+        return len(self.cells) * self.cells.itemsize
@@ -0,0 +1,135 @@
+# pack.py
+#
+# Puzzle pack files:
+#   header  <4sHHQQ  magic, version, reserved, puzzle count, index offset
+#   records          per puzzle: size byte, then 4 bits per edge (n, e, s, w
+#                    per tile, solution order, two edges per byte)
+#   index   <Q * count  file offset of every record
+#
+# Records are written as they come and the index goes last, so packs can be
+# streamed to disk. Reading maps the file and slices out one record.
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Tuple
+
+Tile = Tuple[int, int, int, int]
+
+MAGIC = b"TVXP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQ")
+OFFSET = struct.Struct("<Q")
+
+# one edge value per byte <-> its hex digit, for nibble packing through
+# bytes.fromhex / bytes.hex
+HEX_DIGITS = bytes.maketrans(bytes(range(16)), b"0123456789abcdef")
+FROM_HEX = bytes.maketrans(b"0123456789abcdef", bytes(range(16)))
+SIZE_BYTES = [bytes((size,)) for size in range(256)]
+
+
+def pack_edges(packed: bytes) -> bytes:
+    # one value per byte -> two values per byte
+    return bytes.fromhex(packed.translate(HEX_DIGITS).decode("ascii"))
+
+
+def unpack_edges(data: bytes) -> bytes:
+    return data.hex().encode("ascii").translate(FROM_HEX)
+
+
+def record_size(size: int) -> int:
+    return 1 + size * size * 2
+
+
+class PackWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "wb")
+        self.offsets = array("Q")
+        self.offset = HEADER.size
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def add(self, size: int, packed: bytes):
+        if not 1 <= size <= 255 or len(packed) != 4 * size * size:
+            raise ValueError("bad puzzle of size {}".format(size))
+        self.offsets.append(self.offset)
+        self.file.write(SIZE_BYTES[size] + pack_edges(packed))
+        self.offset += record_size(size)
+
+    def close(self):
+        if self.file.closed:
+            return
+        if sys.byteorder != "little":
+            self.offsets.byteswap()
+        self.file.write(self.offsets.tobytes())
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, len(self.offsets), self.offset))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_pack(path: str, puzzles: Iterable[Tuple[int, bytes]]) -> int:
+    with PackWriter(path) as writer:
+        for size, packed in puzzles:
+            writer.add(size, packed)
+        return len(writer.offsets)
+
+
+class PuzzlePack:
+    """
+    Read-only, memory-mapped puzzle pack.
+
+    Opening reads only the header; pack[n] costs one index lookup and one
+    record slice regardless of how many puzzles the file holds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError("{} is empty".format(path))
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError("{} is not a puzzle pack".format(path))
+        magic, version, _, self.count, self.index_offset = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("{} is not a puzzle pack".format(path))
+        if self.index_offset + self.count * OFFSET.size > len(self.map):
+            self.close()
+            raise ValueError("{} is truncated".format(path))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, n: int) -> Tuple[int, bytes]:
+        # (size, packed) with one edge value per byte, as from model.generate
+        if n < 0:
+            n += self.count
+        if not 0 <= n < self.count:
+            raise IndexError(n)
+        (offset,) = OFFSET.unpack_from(self.map, self.index_offset + n * OFFSET.size)
+        size = self.map[offset]
+        data = self.map[offset + 1:offset + record_size(size)]
+        return size, unpack_edges(data)
+
+    def tiles(self, n: int) -> Tuple[int, List[Tile]]:
+        size, packed = self[n]
+        return size, [tuple(packed[k:k + 4]) for k in range(0, len(packed), 4)]
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,151 @@
+# parallel.py
+#
+# One puzzle solved across processes:
+#   python -m model.parallel --size 10 --values 3 --workers 8 --serial
+#
+# Solver.split cuts the search tree at the first placements in fill order
+# into many more subtrees than workers. The pool hands them out one at a
+# time, so a worker that finishes a small subtree takes the next one while
+# the others are still busy. The first solution found sets a shared event
+# that stops the running searches, and the queued subtrees are cancelled.
+#
+# Workers get the puzzle once, as packed bytes, when they start; a subtree
+# is just the tile type ids of its fixed placements.
+
+import argparse
+import os
+import random
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from model.generate import solved_tiles, unpack_tiles
+from model.solver import Solver, Tile
+
+# subtrees per worker; more balance the load better, fewer cost less to cut
+JOBS_PER_WORKER = 16
+
+# how often the parent checks the caller's stop event, in seconds
+STOP_POLL = 0.05
+
+# set in each worker process by init_worker
+WORKER: Optional[Tuple[Solver, List[int], Dict[int, Tile], object, Optional[int]]] = None
+
+
+def pack_tiles(tiles: Sequence[Tile]) -> bytes:
+    return bytes(value for tile in tiles for value in tile)
+
+
+def init_worker(
+    num_rows: int,
+    num_cols: int,
+    packed: bytes,
+    cells: bytes,
+    fixed_cells: bytes,
+    fixed_tiles: bytes,
+    stop,
+    max_nodes: Optional[int],
+):
+    # the solver is built once per process; its tile types come out in the
+    # same order as in the parent, so type ids mean the same on both sides
+    global WORKER
+    solver = Solver(unpack_tiles(packed), num_rows, num_cols)
+    base = dict(zip(array("H", fixed_cells), unpack_tiles(fixed_tiles)))
+    WORKER = (solver, list(array("H", cells)), base, stop, max_nodes)
+
+
+def solve_subtree(prefix: bytes) -> Optional[bytes]:
+    # process pool entry point: the packed solution, or None
+    solver, cells, base, stop, max_nodes = WORKER
+    if stop.is_set():
+        return None
+    fixed = dict(base)
+    for cell, tid in zip(cells, array("H", prefix)):
+        fixed[cell] = solver.types[tid]
+    solution = solver.solve(fixed, max_nodes, stop)
+    return pack_tiles(solution) if solution else None
+
+
+def solve_parallel(
+    tiles: Sequence[Tile],
+    num_rows: int,
+    num_cols: int,
+    fixed: Optional[Dict[int, Tile]] = None,
+    workers: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+) -> Optional[List[Tile]]:
+    # Same result as Solver(tiles, num_rows, num_cols).solve(fixed, ...),
+    # though with several solutions not necessarily the same one.
+    # max_nodes bounds each subtree's search
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = workers or os.cpu_count() or 1
+    solver = Solver(tiles, num_rows, num_cols)
+    cells, prefixes = solver.split(workers * JOBS_PER_WORKER, fixed)
+    if not prefixes:
+        return None
+
+    if len(prefixes) == 1:
+        # the tree does not branch early enough to share out
+        return solver.solve(fixed, max_nodes, stop)
+
+    fixed = fixed or {}
+    jobs = [array("H", prefix).tobytes() for prefix in prefixes]
+    context = multiprocessing.get_context()
+    found = context.Event()
+    initargs = (
+        num_rows, num_cols, pack_tiles(tiles), array("H", cells).tobytes(),
+        array("H", fixed).tobytes(), pack_tiles(fixed.values()), found, max_nodes,
+    )
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context,
+                             initializer=init_worker, initargs=initargs) as pool:
+        pending = {pool.submit(solve_subtree, job) for job in jobs}
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=STOP_POLL, return_when=FIRST_COMPLETED)
+                if stop is not None and stop.is_set():
+                    return None
+                for future in done:
+                    packed = future.result()
+                    if packed:
+                        return unpack_tiles(packed)
+        finally:
+            # running searches see the event within 1024 nodes
+            found.set()
+            for future in pending:
+                future.cancel()
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve one Tetravex puzzle across processes.")
+    parser.add_argument("--size", type=int, default=10, help="board size")
+    parser.add_argument("--values", type=int, default=3, help="distinct edge values; fewer make harder searches")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible puzzle")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-nodes", type=int, default=None, help="solver budget per subtree")
+    parser.add_argument("--serial", action="store_true", help="also solve in this process, for comparison")
+    args = parser.parse_args(argv)
+
+    if args.size < 1 or not 1 <= args.values <= 16:
+        parser.error("--size must be positive and --values between 1 and 16")
+
+    rng = random.Random(args.seed)
+    tiles = solved_tiles(args.size, rng, args.values)
+    rng.shuffle(tiles)
+
+    start = time.perf_counter()
+    solution = solve_parallel(tiles, args.size, args.size, workers=args.workers, max_nodes=args.max_nodes)
+    print("parallel: {} in {:.3f}s".format("solved" if solution else "no solution", time.perf_counter() - start))
+
+    if args.serial:
+        start = time.perf_counter()
+        solution = Solver(tiles, args.size, args.size).solve(max_nodes=args.max_nodes)
+        print("serial:   {} in {:.3f}s".format("solved" if solution else "no solution", time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
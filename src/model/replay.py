@@ -0,0 +1,277 @@
+# replay.py
+#
+# Recorded games and a headless runner for them. A recording is the seed the
+# game was dealt from plus its moves as cell-index pairs, packed like MoveLog:
+#   file header     <4sH     magic, version
+#   per recording   <HQI     size, seed, move count
+#                   u16[]    idx1, idx2 per move, little-endian
+#
+#   python -m model.replay games.rec --check step
+#   python -m model.replay games.rec --make 100 --moves 10000 --size 8
+
+import argparse
+import random
+from collections import deque
+import struct
+import sys
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from model.board import Board
+from model.engine import Engine
+
+MAGIC = b"TVXR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+RECORD_HEADER = struct.Struct("<HQI")
+
+CHECKS = ("step", "end")
+
+
+@dataclass
+class Recording:
+    size: int
+    seed: int
+    moves: array  # array('H') of cell-index pairs
+
+
+@dataclass
+class ReplayResult:
+    seed: int
+    moves: int
+    solved: bool
+    wrong: int
+    # first move after which the board was solved, -1 if never; None when
+    # only the end position was checked
+    solved_at: Optional[int]
+    # incremental state matched a recount of the final board; None when
+    # only the end position was checked
+    consistent: Optional[bool]
+    # moves that led back to one of the last repeat_window positions, going
+    # by the engine's Zobrist hash; None when repeats were not counted
+    repeats: Optional[int] = None
+
+
+def deal(size: int, seed: int) -> Engine:
+    # the same deal Controller.on_new_game makes for a seed
+    engine = Engine()
+    engine.new_game(size, random.Random(seed))
+    return engine
+
+
+class RecordingWriter:
+    """
+    Appends recordings to a file, writing the file header if it is new.
+    """
+
+    def __init__(self, path: str):
+        self.file: BinaryIO = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def add(self, recording: Recording):
+        moves = recording.moves
+        if sys.byteorder != "little":
+            moves = array("H", moves)
+            moves.byteswap()
+        self.file.write(RECORD_HEADER.pack(recording.size, recording.seed, len(moves) // 2))
+        self.file.write(moves.tobytes())
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "RecordingWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def write_recordings(path: str, recordings: Iterable[Recording]):
+    with RecordingWriter(path) as writer:
+        for recording in recordings:
+            writer.add(recording)
+
+
+def iter_recordings(path: str) -> Iterator[Recording]:
+    # streams one recording at a time, so files of any length replay in
+    # constant memory
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            raise ValueError("{} is not a recording file".format(path))
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a recording file".format(path))
+
+        while True:
+            head = f.read(RECORD_HEADER.size)
+            if not head:
+                return
+            if len(head) < RECORD_HEADER.size:
+                raise ValueError("{} is truncated".format(path))
+            size, seed, num_moves = RECORD_HEADER.unpack(head)
+            moves = array("H")
+            try:
+                moves.fromfile(f, num_moves * 2)
+            except EOFError:
+                raise ValueError("{} is truncated".format(path)) from None
+            if sys.byteorder != "little":
+                moves.byteswap()
+            # every move is a pair of cell indexes on the dealt board
+            if size < 1 or max(moves, default=0) >= 2 * size * size:
+                raise ValueError("{} is corrupt".format(path))
+            yield Recording(size, seed, moves)
+
+
+def random_recording(size: int, seed: int, num_moves: int, rng: random.Random) -> Recording:
+    # uniformly random swaps anywhere on the board, for load and regression runs
+    num_cells = size * size * 2
+    moves = array("H", (rng.randrange(num_cells) for _ in range(num_moves * 2)))
+    return Recording(size, seed, moves)
+
+
+def replay(recording: Recording, check: str = "step", repeat_window: int = 0) -> ReplayResult:
+    # repeat_window > 0 counts repeats in step mode, remembering that many
+    # of the latest positions
+    engine = deal(recording.size, recording.seed)
+    num_moves = len(recording.moves) // 2
+    it = iter(recording.moves)
+
+    if check == "end":
+        # only the final position matters, so compose the swaps as a
+        # permutation of cells and build that board once
+        board = engine.board
+        perm = list(range(board.num_rows * board.num_cols))
+        for a, b in zip(it, it):
+            perm[a], perm[b] = perm[b], perm[a]
+
+        final = Board(board.num_rows, board.num_cols)
+        for idx, src in enumerate(perm):
+            if board.active[src]:
+                final.set_tile(idx, board.tile(src), board.home[src])
+        engine.set_board(final)
+        return ReplayResult(
+            recording.seed, num_moves, engine.is_solved(), len(engine.get_wrong_coords()), None, None
+        )
+
+    if check != "step":
+        raise ValueError("check must be one of {}".format(", ".join(CHECKS)))
+
+    solved_at = -1
+    swap_cells = engine.swap_cells
+    is_solved = engine.is_solved
+    if repeat_window <= 0:
+        repeats = None
+        for step, (a, b) in enumerate(zip(it, it)):
+            swap_cells(a, b)
+            if solved_at < 0 and is_solved():
+                solved_at = step
+    else:
+        # window holds the latest positions in order, seen how often each
+        # of them occurs in it
+        repeats = 0
+        window = deque([engine.zobrist])
+        seen = {engine.zobrist: 1}
+        for step, (a, b) in enumerate(zip(it, it)):
+            swap_cells(a, b)
+            if solved_at < 0 and is_solved():
+                solved_at = step
+            position = engine.zobrist
+            if position in seen:
+                repeats += 1
+            seen[position] = seen.get(position, 0) + 1
+            window.append(position)
+            if len(window) > repeat_window:
+                oldest = window.popleft()
+                if seen[oldest] == 1:
+                    del seen[oldest]
+                else:
+                    seen[oldest] -= 1
+
+    recount = Engine()
+    recount.set_board(engine.board)
+    consistent = (
+        (engine.codes is None or recount.zobrist == engine.zobrist)
+        and recount.bad_edges == engine.bad_edges
+        and recount.empty_rhs == engine.empty_rhs
+        and recount.bad_count == engine.bad_count
+        and recount.wrong == engine.wrong
+    )
+    return ReplayResult(
+        recording.seed, num_moves, is_solved(), len(engine.get_wrong_coords()), solved_at, consistent, repeats
+    )
+
+
+def replay_all(
+    recordings: Iterable[Recording], check: str = "step", repeat_window: int = 0
+) -> Iterator[ReplayResult]:
+    for recording in recordings:
+        yield replay(recording, check, repeat_window)
+
+
+def digest(result: ReplayResult, crc: int = 0) -> int:
+    # running crc32 over each game's final position; the same in both check
+    # modes, so runs of different engine versions can be compared
+    line = "{} {} {} {}\n".format(result.seed, result.moves, int(result.solved), result.wrong)
+    return zlib.crc32(line.encode(), crc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Tetravex games without a display.")
+    parser.add_argument("path", help="recording file")
+    parser.add_argument(
+        "--check", choices=CHECKS, default="step",
+        help="check the board after every move, or only the final position",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=0, metavar="N",
+        help="in step mode, count moves back to one of the last N positions",
+    )
+    parser.add_argument("--make", type=int, default=0, metavar="N", help="append N random games to path instead")
+    parser.add_argument("--moves", type=int, default=1000, help="moves per game for --make")
+    parser.add_argument("--size", type=int, default=3, help="board size for --make")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --make")
+    args = parser.parse_args(argv)
+
+    if args.make:
+        if not 1 <= args.size <= 128:
+            parser.error("--size must be between 1 and 128")
+        rng = random.Random(args.seed)
+        write_recordings(args.path, (
+            random_recording(args.size, rng.getrandbits(63), args.moves, rng)
+            for _ in range(args.make)
+        ))
+        return
+
+    games = moves = solved = inconsistent = repeats = 0
+    crc = 0
+    start = time.perf_counter()
+    for result in replay_all(iter_recordings(args.path), args.check, args.repeats):
+        games += 1
+        moves += result.moves
+        solved += result.solved
+        repeats += result.repeats or 0
+        inconsistent += result.consistent is False
+        crc = digest(result, crc)
+    elapsed = time.perf_counter() - start
+
+    print("{} games, {} moves in {:.3f} s ({:.0f} moves/s)".format(
+        games, moves, elapsed, moves / elapsed if elapsed else 0.0))
+    print("solved {}, digest {:08x}".format(solved, crc))
+    if args.repeats and args.check == "step":
+        print("{} moves back to one of the last {} positions".format(repeats, args.repeats))
+    if inconsistent:
+        print("{} games ended with incremental state out of step".format(inconsistent))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# savegame.py
+#
+# In-progress games as one struct-packed record:
+#   header  <4sHHHBhhhhhh  magic, version, rows, cols, flags, clicked i/j,
+#                          hint coords (i1, j1, i2, j2), -1 meaning none
+#   body                   Board.edges, Board.active, Board.home (little-endian u32)
+
+import os
+import struct
+import sys
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from model.board import Board
+
+MAGIC = b"TVXS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHBhhhhhh")
+
+FLAG_SEEN_WIN = 1
+
+DEFAULT_SAVE_PATH = os.path.join(os.path.expanduser("~"), ".tetravex_autosave")
+
+Coord = Tuple[int, int]
+
+
+@dataclass
+class SavedGame:
+    board: Board
+    clicked_square: Optional[Coord]
+    hint_coords: List[Coord]
+    seen_win: bool
+
+
+def encode_game(
+    board: Board,
+    clicked_square: Optional[Coord],
+    hint_coords: List[Coord],
+    seen_win: bool,
+) -> bytes:
+    clicked = clicked_square or (-1, -1)
+    hints = [x for coord in hint_coords[:2] for x in coord]
+    hints += [-1] * (4 - len(hints))
+    flags = FLAG_SEEN_WIN if seen_win else 0
+
+    home = array("I", board.home)
+    if sys.byteorder != "little":
+        home.byteswap()
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, board.num_rows, board.num_cols, flags, *clicked, *hints),
+        board.edges.tobytes(),
+        bytes(board.active),
+        home.tobytes(),
+    ))
+
+
+def decode_game(data: bytes) -> SavedGame:
+    if len(data) < HEADER.size:
+        raise ValueError("save file is truncated")
+    magic, version, num_rows, num_cols, flags, ci, cj, *hints = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a save file")
+
+    # the app only makes boards with the RHS as wide as the LHS
+    if num_rows == 0 or num_cols != 2 * num_rows:
+        raise ValueError("save file is corrupt")
+    num_cells = num_rows * num_cols
+    if len(data) != HEADER.size + num_cells * 9:
+        raise ValueError("save file is truncated")
+
+    board = Board(num_rows, num_cols)
+    k = HEADER.size
+    # edge values are 0..15; read unsigned, negative ones are 128 and up
+    if max(data[k:k + num_cells * 4], default=0) > 15:
+        raise ValueError("save file is corrupt")
+    board.edges = array("b", data[k:k + num_cells * 4])
+    k += num_cells * 4
+    board.active = bytearray(data[k:k + num_cells])
+    if max(board.active) > 1:
+        raise ValueError("save file is corrupt")
+    k += num_cells
+    board.home = array("I", data[k:])
+    if sys.byteorder != "little":
+        board.home.byteswap()
+    if any(h >= num_cells for h in board.home):
+        raise ValueError("save file is corrupt")
+
+    clicked_square = (ci, cj) if ci >= 0 else None
+    hint_coords = [(hints[0], hints[1]), (hints[2], hints[3])] if hints[0] >= 0 else []
+    for i, j in filter(None, [clicked_square, *hint_coords]):
+        if not (0 <= i < num_rows and 0 <= j < num_cols):
+            raise ValueError("save file is corrupt")
+    return SavedGame(board, clicked_square, hint_coords, bool(flags & FLAG_SEEN_WIN))
+
+
+def write_atomic(path: str, data: bytes):
+    # a crash mid-write leaves the previous save intact
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_game(path: str = DEFAULT_SAVE_PATH) -> SavedGame:
+    with open(path, "rb") as f:
+        return decode_game(f.read())
+
+
+class AutoSaver:
+    """
+    Writes save records on a background thread.
+
+    submit() only swaps in the newest record and returns, so the caller never
+    waits on disk I/O. Records submitted while a write is in progress are
+    coalesced: only the latest one is written next.
+    """
+
+    def __init__(self, path: str = DEFAULT_SAVE_PATH):
+        self.path = path
+        self.pending: Optional[bytes] = None
+        self.busy = False
+        self.closed = False
+        self.writes = 0
+        self.errors = 0
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+
+    def submit(self, data: bytes):
+        with self.cond:
+            self.pending = data
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closed:
+                    self.cond.wait()
+                if self.pending is None:
+                    return
+                data, self.pending = self.pending, None
+                self.busy = True
+
+            try:
+                write_atomic(self.path, data)
+                self.writes += 1
+            except OSError:
+                self.errors += 1
+
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # wait until everything submitted so far is on disk
+        with self.cond:
+            return self.cond.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
@@ -0,0 +1,239 @@
+# selfplay.py
+#
+# Headless self-play: deals games with Engine.new_game and plays them with a
+# move policy until is_solved or a move limit, across a process pool.
+#   python -m model.selfplay --sizes 3 4 --games 1000 --policy greedy --out games.jsonl
+#
+# One JSON line per game is written as results come in; a summary per board
+# size and policy follows at the end.
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from model.engine import Engine, Move
+from model.hints import HintPlan
+
+DEFAULT_MAX_MOVES = 10_000
+
+# candidate swaps the greedy policy scores per move
+GREEDY_TRIES = 64
+
+# solver budget per game; past it the solver policy follows the dealt homes
+SOLVER_MAX_NODES = 300_000
+
+
+@dataclass
+class GameResult:
+    size: int
+    seed: int
+    policy: str
+    solved: bool
+    moves: int
+    seconds: float
+
+
+def score(engine: Engine) -> int:
+    # 0 exactly when solved; an empty RHS cell weighs as much as the
+    # 4 edges a tile placed there can mismatch
+    return engine.bad_edges + 4 * engine.empty_rhs
+
+
+class RandomPolicy:
+    """Swaps two random cells."""
+
+    def __init__(self, engine: Engine, rng: random.Random):
+        self.engine = engine
+        self.rng = rng
+
+    def next_move(self) -> Optional[Move]:
+        board = self.engine.board
+        rng = self.rng
+        return Move(
+            rng.randrange(board.num_rows), rng.randrange(board.num_cols),
+            rng.randrange(board.num_rows), rng.randrange(board.num_cols),
+        )
+
+
+class GreedyPolicy(RandomPolicy):
+    """
+    Scores GREEDY_TRIES random swaps and plays the one that lowers the
+    mismatch score most, or a random swap when none of them helps.
+    """
+
+    def next_move(self) -> Optional[Move]:
+        engine = self.engine
+        board = engine.board
+        active = board.active
+        num_cells = board.num_rows * board.num_cols
+        rng = self.rng
+
+        best = None
+        best_score = score(engine)
+        for _ in range(GREEDY_TRIES):
+            a = rng.randrange(num_cells)
+            b = rng.randrange(num_cells)
+            if a == b or not (active[a] or active[b]):
+                continue
+            # a swap undoes itself, so each candidate costs two swaps
+            engine.swap_cells(a, b)
+            value = score(engine)
+            engine.swap_cells(a, b)
+            if value < best_score:
+                best, best_score = (a, b), value
+
+        if best is None:
+            return super().next_move()
+        (i1, j1), (i2, j2) = divmod(best[0], board.num_cols), divmod(best[1], board.num_cols)
+        return Move(i1, j1, i2, j2)
+
+
+class SolverPolicy:
+    """
+    Solves the deal once, then moves one tile into its solved cell per move.
+    """
+
+    def __init__(self, engine: Engine, rng: random.Random):
+        targets = engine.solve(SOLVER_MAX_NODES)
+        self.plan = HintPlan(targets) if targets is not None else HintPlan.from_homes(engine.board)
+
+    def next_move(self) -> Optional[Move]:
+        move = self.plan.next_move()
+        if not move:
+            return None
+        (i1, j1), (i2, j2) = move
+        self.plan.swap((i1, j1), (i2, j2))
+        return Move(i1, j1, i2, j2)
+
+
+POLICIES = {
+    "random": RandomPolicy,
+    "greedy": GreedyPolicy,
+    "solver": SolverPolicy,
+}
+
+
+def play_game(job: Tuple[int, int, str, int]) -> GameResult:
+    # process pool entry point; the seed fixes both the deal and the policy's
+    # choices, so a game replays exactly
+    size, seed, policy_name, max_moves = job
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    engine = Engine()
+    engine.new_game(size, rng)
+    policy = POLICIES[policy_name](engine, rng)
+
+    moves = 0
+    while not engine.is_solved() and moves < max_moves:
+        move = policy.next_move()
+        if move is None:
+            break
+        engine.make_move(move)
+        moves += 1
+    return GameResult(size, seed, policy_name, engine.is_solved(), moves, time.perf_counter() - start)
+
+
+def simulate(
+    sizes: List[int],
+    games: int,
+    policy: str,
+    rng: random.Random,
+    workers: Optional[int] = None,
+    max_moves: int = DEFAULT_MAX_MOVES,
+) -> Iterator[GameResult]:
+    # games per size, spread over a process pool with a bounded number in
+    # flight and yielded in submission order
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    jobs = ((size, rng.getrandbits(63), policy, max_moves) for size in sizes for _ in range(games))
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for job in jobs:
+            pending.append(pool.submit(play_game, job))
+            if len(pending) >= 4 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Stats:
+    """Moves-to-solve and time per game, per (size, policy)."""
+
+    def __init__(self):
+        self.moves: Dict[Tuple[int, str], List[int]] = {}
+        self.games: Dict[Tuple[int, str], int] = {}
+        self.seconds: Dict[Tuple[int, str], float] = {}
+
+    def add(self, result: GameResult):
+        key = (result.size, result.policy)
+        self.games[key] = self.games.get(key, 0) + 1
+        self.seconds[key] = self.seconds.get(key, 0.0) + result.seconds
+        solved = self.moves.setdefault(key, [])
+        if result.solved:
+            solved.append(result.moves)
+
+    def summary(self) -> List[dict]:
+        out = []
+        for key in sorted(self.games):
+            size, policy = key
+            moves = sorted(self.moves[key])
+            games = self.games[key]
+            row = {
+                "size": size,
+                "policy": policy,
+                "games": games,
+                "solved": len(moves),
+                "ms_per_game": self.seconds[key] / games * 1e3,
+            }
+            if moves:
+                row.update({
+                    "moves_min": moves[0],
+                    "moves_p50": moves[len(moves) // 2],
+                    "moves_p90": moves[min(len(moves) - 1, int(len(moves) * 0.9))],
+                    "moves_max": moves[-1],
+                })
+            out.append(row)
+        return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Tetravex games headlessly with a move policy.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3], help="board sizes to play")
+    parser.add_argument("--games", type=int, default=100, help="games per size")
+    parser.add_argument("--policy", choices=list(POLICIES), default="greedy")
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES, help="unsolved games stop here")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible games")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--out", default="-", help="JSON lines file, one line per game, - for stdout")
+    args = parser.parse_args(argv)
+
+    if any(size < 1 for size in args.sizes):
+        parser.error("--sizes must be positive")
+
+    stats = Stats()
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        for result in simulate(args.sizes, args.games, args.policy, random.Random(args.seed), args.workers, args.max_moves):
+            stats.add(result)
+            out.write(json.dumps(asdict(result)) + "\n")
+            # flushed per game so the file can be read while games still run
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    # the summary goes to stderr when the games go to stdout
+    report = sys.stderr if out is sys.stdout else sys.stdout
+    for row in stats.summary():
+        print(json.dumps(row), file=report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# solver.py
+
+import heapq
+import threading
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# a tile is its (n, e, s, w) edge values
+Tile = Tuple[int, int, int, int]
+
+# side indices into a Tile, and the side facing it on the neighbour
+N, E, S, W = 0, 1, 2, 3
+OPPOSITE = (S, W, N, E)
+
+
+class Solver:
+    """
+    Depth-first Tetravex solver.
+
+    Tiles with identical edges are collapsed into one tile type with a count,
+    so permutations of duplicates are never explored twice. Candidates come
+    from an index keyed by the edge values the already placed neighbours
+    require. After every placement the search moves on to the empty cell
+    with the fewest tiles left that fit it, and backtracks at once when some
+    cell next to the placed tiles has none.
+
+    Search cost grows steeply with board size. CPython places about 100k
+    tiles a second; with the generator's 10 edge values, 6x6 boards take
+    tens of milliseconds, 8x8 ones seconds with some past 2 million nodes,
+    and 10x10 ones rarely finish within that. Callers bound the search
+    with max_nodes or stop.
+    """
+
+    def __init__(self, tiles: Sequence[Tile], num_rows: int, num_cols: int):
+        if len(tiles) != num_rows * num_cols:
+            raise ValueError("expected {} tiles, got {}".format(num_rows * num_cols, len(tiles)))
+
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+
+        # collapse duplicate tiles into types
+        self.types: List[Tile] = []
+        self.counts: List[int] = []
+        type_ids: Dict[Tile, int] = {}
+        for tile in tiles:
+            tile = tuple(tile)
+            if tile not in type_ids:
+                type_ids[tile] = len(self.types)
+                self.types.append(tile)
+                self.counts.append(0)
+            self.counts[type_ids[tile]] += 1
+
+        # index every combination of known sides -> tile types.
+        # keys pack (value + 1) per side into one int, 0 meaning "any value"
+        self.num_values = max((max(t) for t in self.types), default=0) + 1
+        self.weights = [(self.num_values + 1) ** side for side in range(4)]
+        self.index: Dict[int, List[int]] = {}
+        for tid, tile in enumerate(self.types):
+            for mask in range(16):
+                key = 0
+                for side in range(4):
+                    if mask >> side & 1:
+                        key += (tile[side] + 1) * self.weights[side]
+                self.index.setdefault(key, []).append(tid)
+
+        # contrib[tid][side]: what a placed tile adds to the index key of
+        # the neighbour whose side faces it
+        self.contrib = [
+            [(tile[OPPOSITE[side]] + 1) * self.weights[side] for side in range(4)]
+            for tile in self.types
+        ]
+
+        # (neighbour cell, side of this cell facing it) for every cell
+        self.neighbours: List[List[Tuple[int, int]]] = []
+        for i in range(num_rows):
+            for j in range(num_cols):
+                nbs = []
+                if i > 0:
+                    nbs.append(((i - 1) * num_cols + j, N))
+                if j < num_cols - 1:
+                    nbs.append((i * num_cols + j + 1, E))
+                if i < num_rows - 1:
+                    nbs.append(((i + 1) * num_cols + j, S))
+                if j > 0:
+                    nbs.append((i * num_cols + j - 1, W))
+                self.neighbours.append(nbs)
+
+        self.init_border_counts()
+
+        # search statistics: tiles placed, candidate lists built after a
+        # placement, their total length, and how many held a single tile
+        self.nodes = 0
+        self.expanded = 0
+        self.branches = 0
+        self.single = 0
+        self.aborted = False
+
+    def init_border_counts(self):
+        # Interior edges pair every s with an n (and every e with a w), so per
+        # edge value, (#n - #s) over all tiles equals (#top row n - #bottom
+        # row s). That fixes part of each border's values; the rest is slack
+        # shared equally by the two opposite borders.
+        self.forced = [[0] * self.num_values for _ in range(4)]
+        for tid, tile in enumerate(self.types):
+            count = self.counts[tid]
+            for side in range(4):
+                self.forced[side][tile[side]] += count
+                self.forced[OPPOSITE[side]][tile[side]] -= count
+        for side in range(4):
+            self.forced[side] = [max(0, c) for c in self.forced[side]]
+
+        # slack[N] is shared by the top/bottom pair, slack[E] by right/left
+        self.slack = [0] * 4
+        self.slack[N] = self.slack[S] = self.num_cols - sum(self.forced[N])
+        self.slack[E] = self.slack[W] = self.num_rows - sum(self.forced[W])
+
+        # border sides of each cell
+        self.border_sides: List[Tuple[int, ...]] = []
+        for i in range(self.num_rows):
+            for j in range(self.num_cols):
+                sides = []
+                if i == 0:
+                    sides.append(N)
+                if j == self.num_cols - 1:
+                    sides.append(E)
+                if i == self.num_rows - 1:
+                    sides.append(S)
+                if j == 0:
+                    sides.append(W)
+                self.border_sides.append(tuple(sides))
+
+    def solve(
+        self,
+        fixed: Optional[Dict[int, Tile]] = None,
+        max_nodes: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> Optional[List[Tile]]:
+        for solution in self.iter_solutions(fixed, max_nodes, stop):
+            return solution
+        return None
+
+    def iter_solutions(
+        self,
+        fixed: Optional[Dict[int, Tile]] = None,
+        max_nodes: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> Iterator[List[Tile]]:
+        # yields each solution as a row-major list of tiles.
+        # fixed maps cell index -> tile that must stay in that cell.
+        # max_nodes bounds the search and setting stop (checked every 1024
+        # nodes) cancels it; self.aborted tells whether either happened
+        if not self.reset(fixed):
+            return
+
+        board = self.board
+        border_sides = self.border_sides
+        empty = board.count(-1)
+        if not empty:
+            yield [self.types[tid] for tid in board]
+            return
+
+        # iterative search, so board size is not limited by the recursion
+        # limit. A frame is [cell, candidate tile types, next to try]
+        frame = self.choose()
+        stack = [frame] if frame else []
+        while stack:
+            frame = stack[-1]
+            cell, found, k = frame
+            if board[cell] != -1:
+                self.unplace(cell)
+
+            if k == len(found):
+                stack.pop()
+                continue
+            frame[2] = k + 1
+
+            if self.nodes == max_nodes or (stop and not self.nodes & 1023 and stop.is_set()):
+                self.aborted = True
+                return
+
+            self.place(cell, found[k])
+            self.nodes += 1
+            if border_sides[cell] and not self.border_ok(cell):
+                continue
+            if not self.supply_ok(found[k]):
+                continue
+
+            if len(stack) == empty:
+                yield [self.types[t] for t in board]
+                continue
+
+            frame = self.choose()
+            if frame:
+                stack.append(frame)
+
+    def choose(self) -> Optional[list]:
+        # a search frame for the empty cell next to the placed tiles with
+        # the fewest tiles left that fit it, or the first empty cell when
+        # nothing is placed. None when a cell has no tile left to fit it
+        keys = self.keys
+        index = self.index
+        count_of = self.remaining.__getitem__
+        best = -1
+        best_count = 0
+        for cell in self.frontier:
+            count = sum(map(count_of, index.get(keys[cell], ())))
+            if not count:
+                return None
+            if best < 0 or count < best_count:
+                best, best_count = cell, count
+        if best < 0:
+            best = self.board.index(-1)
+
+        remaining = self.remaining
+        found = [tid for tid in index.get(keys[best], ()) if remaining[tid]]
+        self.expanded += 1
+        self.branches += len(found)
+        if len(found) == 1:
+            self.single += 1
+        return [best, found, 0]
+
+    def reset(self, fixed: Optional[Dict[int, Tile]] = None) -> bool:
+        # empty board and statistics, then the fixed tiles placed; False
+        # when the border counts or the fixed tiles already rule out a solution
+        num_cells = self.num_rows * self.num_cols
+        self.board = [-1] * num_cells
+        self.remaining = list(self.counts)
+        # keys[cell]: index key from the placed neighbours; frontier: empty
+        # cells with at least one of those, touch[cell] of them
+        self.keys = [0] * num_cells
+        self.touch = [0] * num_cells
+        self.frontier = set()
+        # supply[side][value]: tiles left showing value on that side;
+        # demand[side][value]: empty cells whose neighbour across that side
+        # shows value
+        self.supply = [[0] * self.num_values for _ in range(4)]
+        for tid, tile in enumerate(self.types):
+            for side in range(4):
+                self.supply[side][tile[side]] += self.counts[tid]
+        self.demand = [[0] * self.num_values for _ in range(4)]
+        self.used = [[0] * self.num_values for _ in range(4)]
+        self.extra = [0] * 4
+        self.nodes = 0
+        self.expanded = 0
+        self.branches = 0
+        self.single = 0
+        self.aborted = False
+
+        if min(self.slack) < 0:
+            return False
+
+        type_ids = {tile: tid for tid, tile in enumerate(self.types)}
+        for cell, tile in (fixed or {}).items():
+            tid = type_ids.get(tuple(tile))
+            if tid is None or not self.remaining[tid] or self.board[cell] != -1:
+                return False
+            self.place(cell, tid)
+            if not self.fits(cell, tid) or not self.border_ok(cell):
+                return False
+        return True
+
+    def split(self, count: int, fixed: Optional[Dict[int, Tile]] = None) -> Tuple[List[int], List[List[int]]]:
+        # Cuts the search tree into at least count disjoint subtrees where
+        # it has that many: the first cells in fill order, and every list of
+        # tile types for them that passes the edge and border checks. Each
+        # subtree is searched by fixing those tiles on top of fixed
+        if not self.reset(fixed):
+            return [], []
+        order = self.fill_order()
+        prefixes: List[List[int]] = [[]]
+        depth = 0
+        while prefixes and len(prefixes) < count and depth < len(order):
+            cell = order[depth]
+            deeper = []
+            for prefix in prefixes:
+                for prev, tid in zip(order, prefix):
+                    self.place(prev, tid)
+                for tid in self.candidates(cell):
+                    self.place(cell, tid)
+                    if self.border_ok(cell):
+                        deeper.append(prefix + [tid])
+                    self.unplace(cell)
+                for prev in reversed(order[:depth]):
+                    self.unplace(prev)
+            prefixes = deeper
+            depth += 1
+        return order[:depth], prefixes
+
+    def fill_order(self) -> List[int]:
+        # Greedy most-constrained ordering: always take the empty cell with
+        # the most placed (or earlier ordered) neighbours, breaking ties by
+        # distance from the first cell so the filled region stays compact.
+        num_cells = self.num_rows * self.num_cols
+        filled = [tid != -1 for tid in self.board]
+        touch = [0] * num_cells
+        for cell in range(num_cells):
+            if filled[cell]:
+                for nb, _ in self.neighbours[cell]:
+                    touch[nb] += 1
+
+        empty = [cell for cell in range(num_cells) if not filled[cell]]
+        if not empty:
+            return []
+
+        seeds = [cell for cell in range(num_cells) if filled[cell]] or empty[:1]
+        r0, c0 = divmod(seeds[0], self.num_cols)
+
+        def rank(cell):
+            r, c = divmod(cell, self.num_cols)
+            return (-touch[cell], max(abs(r - r0), abs(c - c0)), cell)
+
+        # heap entries go stale when touch changes; skip those on pop
+        heap = [rank(cell) for cell in empty]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            entry = heapq.heappop(heap)
+            cell = entry[2]
+            if filled[cell] or entry != rank(cell):
+                continue
+            filled[cell] = True
+            order.append(cell)
+            for nb, _ in self.neighbours[cell]:
+                touch[nb] += 1
+                if not filled[nb]:
+                    heapq.heappush(heap, rank(nb))
+        return order
+
+    def candidates(self, cell: int) -> List[int]:
+        remaining = self.remaining
+        return [tid for tid in self.index.get(self.keys[cell], ()) if remaining[tid]]
+
+    def fits(self, cell: int, tid: int) -> bool:
+        tile = self.types[tid]
+        for nb, side in self.neighbours[cell]:
+            other = self.board[nb]
+            if other != -1 and self.types[other][OPPOSITE[side]] != tile[side]:
+                return False
+        return True
+
+    def supply_ok(self, tid: int) -> bool:
+        # every empty cell that needs a value on a side gets a tile of its
+        # own, so no value may be needed more often than tiles left show it.
+        # Only the counts a placement changed are checked
+        tile = self.types[tid]
+        supply, demand = self.supply, self.demand
+        for side in range(4):
+            value = tile[side]
+            if demand[side][value] > supply[side][value]:
+                return False
+            other = OPPOSITE[side]
+            if demand[other][value] > supply[other][value]:
+                return False
+        return True
+
+    def border_ok(self, cell: int) -> bool:
+        for side in self.border_sides[cell]:
+            if self.extra[side] > self.slack[side]:
+                return False
+        return True
+
+    def adjust_border(self, cell: int, tid: int, step: int):
+        tile = self.types[tid]
+        for side in self.border_sides[cell]:
+            value = tile[side]
+            other = OPPOSITE[side]
+            used, forced = self.used[side], self.forced[side]
+            other_used, other_forced = self.used[other], self.forced[other]
+
+            # extra values beyond the forced ones must appear on both borders
+            before = max(used[value] - forced[value], other_used[value] - other_forced[value], 0)
+            used[value] += step
+            after = max(used[value] - forced[value], other_used[value] - other_forced[value], 0)
+            self.extra[side] += after - before
+            self.extra[other] += after - before
+
+    def place(self, cell: int, tid: int):
+        board = self.board
+        board[cell] = tid
+        self.remaining[tid] -= 1
+        if self.border_sides[cell]:
+            self.adjust_border(cell, tid, 1)
+
+        keys, touch, frontier = self.keys, self.touch, self.frontier
+        types, supply, demand = self.types, self.supply, self.demand
+        tile = types[tid]
+        contrib = self.contrib[tid]
+        frontier.discard(cell)
+        for side in range(4):
+            supply[side][tile[side]] -= 1
+        for nb, side in self.neighbours[cell]:
+            other = OPPOSITE[side]
+            keys[nb] += contrib[other]
+            touch[nb] += 1
+            if board[nb] == -1:
+                frontier.add(nb)
+                demand[other][tile[side]] += 1
+            else:
+                demand[side][types[board[nb]][other]] -= 1
+
+    def unplace(self, cell: int):
+        board = self.board
+        tid = board[cell]
+        board[cell] = -1
+        self.remaining[tid] += 1
+        if self.border_sides[cell]:
+            self.adjust_border(cell, tid, -1)
+
+        keys, touch, frontier = self.keys, self.touch, self.frontier
+        types, supply, demand = self.types, self.supply, self.demand
+        tile = types[tid]
+        contrib = self.contrib[tid]
+        for side in range(4):
+            supply[side][tile[side]] += 1
+        for nb, side in self.neighbours[cell]:
+            other = OPPOSITE[side]
+            keys[nb] -= contrib[other]
+            touch[nb] -= 1
+            if board[nb] == -1:
+                demand[other][tile[side]] -= 1
+                if not touch[nb]:
+                    frontier.discard(nb)
+            else:
+                demand[side][types[board[nb]][other]] += 1
+        if touch[cell]:
+            frontier.add(cell)
@@ -0,0 +1,44 @@
+# zobrist.py
+#
+# 64-bit keys for Zobrist hashing. A key is splitmix64 of what it stands for
+# instead of an entry in a stored random table, so every process and every
+# run agrees on the keys and none are generated up front.
+
+from typing import Iterable, Sequence
+
+MASK = (1 << 64) - 1
+
+# Board cells hold at most 65536 cells and tiles have 4 values below 16, so
+# (code, cell) fits one int; EMPTY is the code of a cell without a tile
+EMPTY = 1 << 16
+
+
+def splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def tile_code(tile: Sequence[int]) -> int:
+    n, e, s, w = tile
+    return n << 12 | e << 8 | s << 4 | w
+
+
+def cell_key(idx: int, code: int) -> int:
+    # key of a tile in a cell; empty cells add nothing
+    if code == EMPTY:
+        return 0
+    return splitmix64((code << 16 | idx) + (1 << 40))
+
+
+def tile_key(code: int) -> int:
+    # key of a tile regardless of cell, for multiset hashes
+    if code == EMPTY:
+        return 0
+    return splitmix64(code)
+
+
+def multiset_hash(codes: Iterable[int]) -> int:
+    # keys are added rather than xored, so duplicate tiles do not cancel
+    return sum(map(tile_key, codes)) & MASK
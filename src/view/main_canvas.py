@@ -1,171 +1,452 @@
-# main_canvas.py 
+# main_canvas.py
 
-import tkinter as tk 
+import tkinter as tk
+import tkinter.font as tkfont
+
+# delay after the first redraw before Pillow is loaded, ms
+IMAGE_LOAD_MS = 100
 
 # class MainCanvas(tk.Canvas):
 
 class MainCanvas:
-    def __init__(self, root, controller):
-        self.root = root 
+    def __init__(self, root, controller, canvas=None):
+        self.root = root
         self.controller = controller
-        
-        self.canvas = tk.Canvas(self.root, bg="#707070")
-        self.canvas.pack(side='top', fill='both', expand=True) 
-        
+
+        # canvas can be passed in, e.g. a recording stub for benchmarks
+        self.xbar = self.ybar = None
+        if canvas is None:
+            canvas = tk.Canvas(self.root, bg="#707070", xscrollincrement=1, yscrollincrement=1)
+            self.xbar = tk.Scrollbar(self.root, orient=tk.HORIZONTAL, command=canvas.xview)
+            self.ybar = tk.Scrollbar(self.root, orient=tk.VERTICAL, command=canvas.yview)
+            canvas.config(xscrollcommand=self.on_xscroll, yscrollcommand=self.on_yscroll)
+            self.ybar.pack(side='right', fill='y')
+            self.xbar.pack(side='bottom', fill='x')
+        self.canvas = canvas
+        self.canvas.pack(side='top', fill='both', expand=True)
+
         self.canvas.bind("<Button-1>", lambda event: self.controller.on_click(event) )
-        
+
         self.canvas.bind('<Control-minus>', lambda event: self.controller.on_zoom_out() )
         self.canvas.bind('<Control-equal>', lambda event: self.controller.on_zoom_in() )
+        self.canvas.bind('<Control-MouseWheel>', lambda event: self.on_zoom_wheel(event.delta > 0) )
+        self.canvas.bind('<Control-Button-4>', lambda event: self.on_zoom_wheel(True) )
+        self.canvas.bind('<Control-Button-5>', lambda event: self.on_zoom_wheel(False) )
         self.canvas.bind('<Control-n>', lambda event: self.controller.new_of_prev_size() )
         self.canvas.bind('<Control-h>', lambda event: self.controller.on_get_hint() )
+        self.canvas.bind('<Control-d>', lambda event: self.controller.on_toggle_profiler() )
+        self.canvas.bind('<Control-z>', lambda event: self.controller.on_undo() )
+        self.canvas.bind('<Control-y>', lambda event: self.controller.on_redo() )
+
+        # panning: middle drag, wheel (shift for horizontal)
+        self.canvas.bind('<ButtonPress-2>', lambda event: self.canvas.scan_mark(event.x, event.y) )
+        self.canvas.bind('<B2-Motion>', lambda event: self.canvas.scan_dragto(event.x, event.y, gain=1) )
+        # one step per event: macOS and touchpads send deltas well under 120
+        self.canvas.bind('<MouseWheel>', lambda event: self.on_wheel(-1 if event.delta > 0 else 1, event.state & 1) )
+        self.canvas.bind('<Button-4>', lambda event: self.on_wheel(-1, event.state & 1) )
+        self.canvas.bind('<Button-5>', lambda event: self.on_wheel(1, event.state & 1) )
+        self.canvas.bind('<Configure>', lambda event: self.update_viewport() )
 
         self.canvas.focus_set()
 
-        self.canvas.pack(side="top", fill="both", expand=True)
-    
-    def get_font_color(self, hex_color) -> str:
-        r = int(hex_color[1:3], 16)
-        g = int(hex_color[3:5], 16)
-        b = int(hex_color[5:7], 16)
-        
-        luminance = 0.299 * r + 0.587 * g + 0.114 * b
-        
-        return "#ffffff" if luminance < 128 else "#000000"
-
-    def dim_color(self, color) -> str:
-        r = int(color[1:3], 16)
-        g = int(color[3:5], 16)
-        b = int(color[5:7], 16)
-        
-        # special highlight for stencil theme
-        if (r == 0 and g == 0 and b == 0):
-            return "#220022"
-
-        offset = 40 
-        r = max(0, r - offset)
-        g = max(0, g - offset)
-        b = max(0, b - offset)
-
-        return "#{:02x}{:02x}{:02x}".format(r, g, b)
-    
-    def draw_block(self, 
-        block, 
-        x0, y0, x1, y1, 
-        tile_size,
-        current_colors: dict, 
-        dimmed: bool
-    ):
-        xc, yc = x0 + tile_size // 2, y0 + tile_size // 2
-        b_c = (xc, yc)
-        
-        # vertices for tile
-        b_nw, b_ne, b_sw, b_se = (x0, y0), (x1, y0), (x0, y1), (x1, y1)
-
-        # text anchor positions
-        tn = (x0 + int(tile_size * 0.50), y0 + int(tile_size * 0.25))
-        te = (x0 + int(tile_size * 0.75), y0 + int(tile_size * 0.50))
-        ts = (x0 + int(tile_size * 0.50), y0 + int(tile_size * 0.75))
-        tw = (x0 + int(tile_size * 0.25), y0 + int(tile_size * 0.50))
-
-        # Define edge data for looping
-        edges = [block.n, block.e, block.s, block.w]
-        triangles = [
-            [b_c, b_ne, b_nw],  # N
-            [b_c, b_se, b_ne],  # E
-            [b_c, b_sw, b_se],  # S
-            [b_c, b_nw, b_sw],  # W
-        ]
-        text_positions = [tn, te, ts, tw]
-
-        # Draw each edge using a single loop
-        for val, tri_pts, text_pos in zip(edges, triangles, text_positions):
-            tri_color = current_colors.get(val, '#000000')
-            text_color = self.get_font_color(tri_color)
-            if dimmed:
-                tri_color = self.dim_color(tri_color)
-            
-            outline_color = current_colors.get('outline', '#000000')
-            self.canvas.create_polygon(
-                tri_pts, 
-                fill=tri_color, 
-                width=1, 
-                outline=outline_color
-            )
-            
-            self.canvas.create_text(
-                *text_pos, 
-                text=str(val), 
-                anchor=tk.CENTER, 
-                font=("Arial", int(tile_size * 0.15) ), 
-                fill=text_color
-            )
-    
-    def redraw(self, board_state, settings_state, square_state):
+        # Only cells inside the viewport have canvas items. Items come in
+        # slots, one slot per visible cell; slots of cells that scroll out
+        # of view go to a free list and are moved to the next cell that
+        # scrolls in, so the item count follows the window size.
+        self.layout = None
+        self.theme = None
+        self.slots = []          # canvas item ids of each slot
+        self.slot_pos = []       # top left corner each slot is drawn at
+        self.slot_drawn = []     # (tile, dimmed) each slot shows, None = unknown
+        self.slot_of = {}        # cell idx -> slot
+        self.free_slots = []
+        self.visible = (0, 0, 0, 0)
+
+        # hint / bad cell outlines for visible coords, recycled the same way
+        self.wanted = {}
+        self.overlays = {}
+        self.overlay_colors = {}
+        self.free_overlays = []
+
+        # inputs of the last redraw, reused when only the view moves
+        self.board_state = None
+        self.settings_state = None
+        self.clicked_idx = None
+
+        # pre-rendered tile images, one image item per slot when available.
+        # Importing Pillow takes tens of ms, so the first frames are drawn
+        # with polygons and the image cache is loaded once the window is up
+        self.tile_images = None
+        self.slot_images = []
+        self.images_pending = root is not None
+
+        # scale of the items relative to the layout tile size while a zoom
+        # previews; label fonts per point size
+        self.zoom = 1.0
+        self.fonts = {}
+
+        # canvas items created so far, read by the profiler once per frame
+        self.items_created = 0
+        self.debug_item = None
+
+    def on_xscroll(self, first, last):
+        self.xbar.set(first, last)
+        self.update_viewport()
+
+    def on_yscroll(self, first, last):
+        self.ybar.set(first, last)
+        self.update_viewport()
+
+    def on_wheel(self, steps, horizontal):
+        if not self.layout:
+            return
+        amount = steps * (self.layout[2] // 2)
+        if horizontal:
+            self.canvas.xview_scroll(amount, "units")
+        else:
+            self.canvas.yview_scroll(amount, "units")
+
+    def on_zoom_wheel(self, zoom_in):
+        if zoom_in:
+            self.controller.on_zoom_in()
+        else:
+            self.controller.on_zoom_out()
+
+    def event_coords(self, event):
+        # window coords of a mouse event -> board coords at the layout tile size
+        x = self.canvas.canvasx(event.x) / self.zoom
+        y = self.canvas.canvasy(event.y) / self.zoom
+        return int(x), int(y)
+
+    def label_font(self, tile_size):
+        size = max(1, int(tile_size * 0.15))
+        font = self.fonts.get(size)
+        if font is None:
+            # a stub canvas in benchmarks has no Tk root for a Font
+            font = tkfont.Font(root=self.root, family="Arial", size=size) if self.root else ("Arial", size)
+            self.fonts[size] = font
+        return font
+
+    def board_extent(self, tile):
+        num_rows, num_cols, _ = self.layout
+        return num_cols * tile + tile // 2, num_rows * tile
+
+    def preview_zoom(self, scale):
+        # Stretch the current items to scale x the layout tile size, keeping
+        # the centre of the view in place. Nothing is created or recoloured;
+        # redraw() rebuilds at the real size once the zoom settles
+        if not self.layout:
+            return
+        factor = scale / self.zoom
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        cx = self.canvas.canvasx(width / 2)
+        cy = self.canvas.canvasy(height / 2)
+
+        self.canvas.scale("all", 0, 0, factor, factor)
+        self.zoom = scale
+
+        tile = self.layout[2]
+        full_w, full_h = self.board_extent(tile * scale)
+        self.canvas.config(scrollregion=(0, 0, full_w, full_h))
+        self.canvas.xview_moveto(max(0, cx * factor - width / 2) / full_w)
+        self.canvas.yview_moveto(max(0, cy * factor - height / 2) / full_h)
+        if self.slots and not self.tile_images:
+            self.canvas.itemconfig("label", font=self.label_font(tile * scale))
+
+    def scrollbar_size(self):
+        # room the scrollbars take next to the canvas
+        if self.xbar is None:
+            return 0, 0
+        return self.ybar.winfo_reqwidth(), self.xbar.winfo_reqheight()
+
+    def cell_bbox(self, i, j, tile, num_cols):
+        x0 = j * tile
+        y0 = i * tile
+        if j >= num_cols // 2:
+            x0 += tile // 2
+        return x0, y0, x0 + tile, y0 + tile
+
+    def create_slot(self, tile_size) -> int:
+        # items for one cell, bottom to top: background, then either one
+        # tile image or 4 triangles (n, e, s, w) and 4 labels, then grid outline.
+        # New slots start parked outside the scroll region
+        slot = len(self.slots)
+        tag = "slot{}".format(slot)
+        x0, y0 = self.park_pos()
+        x1, y1 = x0 + tile_size, y0 + tile_size
+        items = [self.canvas.create_rectangle(x0, y0, x1, y1, tags=tag)]
+
+        if self.tile_images:
+            items.append(self.canvas.create_image(x0, y0, anchor=tk.NW, state=tk.HIDDEN, tags=tag))
+        else:
+            xc, yc = x0 + tile_size // 2, y0 + tile_size // 2
+            b_c = (xc, yc)
+
+            # vertices for tile
+            b_nw, b_ne, b_sw, b_se = (x0, y0), (x1, y0), (x0, y1), (x1, y1)
+
+            # text anchor positions
+            tn = (x0 + int(tile_size * 0.50), y0 + int(tile_size * 0.25))
+            te = (x0 + int(tile_size * 0.75), y0 + int(tile_size * 0.50))
+            ts = (x0 + int(tile_size * 0.50), y0 + int(tile_size * 0.75))
+            tw = (x0 + int(tile_size * 0.25), y0 + int(tile_size * 0.50))
+
+            triangles = [
+                [b_c, b_ne, b_nw],  # N
+                [b_c, b_se, b_ne],  # E
+                [b_c, b_sw, b_se],  # S
+                [b_c, b_nw, b_sw],  # W
+            ]
+            text_positions = [tn, te, ts, tw]
+
+            for tri_pts in triangles:
+                items.append(self.canvas.create_polygon(tri_pts, width=1, state=tk.HIDDEN, tags=tag))
+            for text_pos in text_positions:
+                items.append(self.canvas.create_text(
+                    *text_pos,
+                    anchor=tk.CENTER,
+                    font=self.label_font(tile_size),
+                    state=tk.HIDDEN,
+                    tags=(tag, "label")
+                ))
+        items.append(self.canvas.create_rectangle(x0, y0, x1, y1, fill='', width=2, tags=tag))
+        self.items_created += len(items)
+
+        self.slots.append(items)
+        self.slot_pos.append((x0, y0))
+        self.slot_drawn.append(None)
+        self.slot_images.append(None)
+
+        # new items land on top; outlines and the debug text stay above them
+        if self.overlays or self.free_overlays:
+            self.canvas.tag_raise("overlay")
+        if self.debug_item is not None:
+            self.canvas.tag_raise("debug")
+        return slot
+
+    def park_pos(self):
+        # left of the scroll region, where the view can never reach
+        tile = self.layout[2]
+        return -2 * tile, -2 * tile
+
+    def move_slot(self, slot, x0, y0):
+        old_x, old_y = self.slot_pos[slot]
+        if (old_x, old_y) != (x0, y0):
+            self.canvas.move("slot{}".format(slot), x0 - old_x, y0 - old_y)
+            self.slot_pos[slot] = (x0, y0)
+
+    def tile_colors(self, tile, palette, dimmed):
+        # fill and text colour per edge, plus the triangle outline colour
+        fill = palette.dim_fill if dimmed else palette.fill
+        fills = [fill[val] for val in tile]
+        text_colors = [palette.text[val] for val in tile]
+        return fills, text_colors, palette.tri_outline
+
+    def configure_slot(self, slot, tile, dimmed, theme, palette):
+        # tile is (n, e, s, w), or None for an empty cell
+        items = self.slots[slot]
+        bg_color = palette.dim_grid_bg if dimmed else palette.grid_bg
+        self.canvas.itemconfig(items[0], fill=bg_color)
+        self.canvas.itemconfig(items[-1], outline=palette.grid_outline)
+
+        if tile is None:
+            for item in items[1:-1]:
+                self.canvas.itemconfig(item, state=tk.HIDDEN)
+            self.slot_images[slot] = None
+            return
+
+        tile_size = self.layout[2]
+        if self.tile_images:
+            key = (tile, theme, tile_size, dimmed)
+            photo = self.tile_images.lookup(key)
+            if photo is None:
+                fills, text_colors, outline_color = self.tile_colors(tile, palette, dimmed)
+                photo = self.tile_images.add(key, tile, tile_size, fills, text_colors, outline_color, bg_color)
+            # the slot holds the image, so cache eviction cannot free it
+            self.slot_images[slot] = photo
+            self.canvas.itemconfig(items[1], image=photo, state=tk.NORMAL)
+            return
+
+        fills, text_colors, outline_color = self.tile_colors(tile, palette, dimmed)
+        for k, val in enumerate(tile):
+            self.canvas.itemconfig(items[1 + k], fill=fills[k], outline=outline_color, state=tk.NORMAL)
+            self.canvas.itemconfig(items[5 + k], text=str(val), fill=text_colors[k], state=tk.NORMAL)
+
+    def build(self, num_rows, num_cols, tile):
         self.canvas.delete("all")
+        self.layout = (num_rows, num_cols, tile)
+        self.zoom = 1.0
+        self.canvas.config(scrollregion=(0, 0, *self.board_extent(tile)))
+        self.slots = []
+        self.slot_pos = []
+        self.slot_drawn = []
+        self.slot_images = []
+        self.slot_of = {}
+        self.free_slots = []
+        self.visible = (0, 0, 0, 0)
+        self.overlays = {}
+        self.overlay_colors = {}
+        self.free_overlays = []
+        self.debug_item = None
 
-        grid = board_state.grid
+    def redraw(self, board_state, settings_state, square_state):
         numRows = board_state.num_rows
         numCols = board_state.num_cols
-
         tile = settings_state.tile_size
-        grid_margin = tile // 2
-
-        current_theme = settings_state.theme 
-        current_colors = settings_state.theme.colors
-        
-        clicked_tile = square_state.clicked_square 
-
-        for i in range(numRows):
-            for j in range(numCols):
-                x0 = j * tile 
-                y0 = i * tile 
-                if j >= numCols // 2:
-                    x0 += grid_margin
-                x1 = x0 + tile
-                y1 = y0 + tile
-                
-                # see if square has been clicked
-                dimmed = False
-                if clicked_tile:
-                    if (i == clicked_tile[0] and j == clicked_tile[1]):
-                        dimmed = True
-
-                # draw grid
-                bg_color = current_theme.grid_bg
-                if dimmed:
-                    bg_color = self.dim_color(bg_color)
-                self.canvas.create_rectangle(x0, y0, x1, y1, fill=bg_color)
-                
-                # draw block
-                block = grid[i][j] 
-                if block.active:
-                    self.draw_block(block, x0, y0, x1, y1, tile, current_colors, dimmed)
-                
-                # draw grid outline
-                outline_color = current_theme.grid_outline
-                self.canvas.create_rectangle(x0, y0, x1, y1, fill='', outline=outline_color, width=2)
-
-        # draw overlays
-        for i in range(numRows):
-            for j in range(numCols):
-                x0 = j * tile 
-                y0 = i * tile 
-                if j >= numCols // 2:
-                    x0 += grid_margin
-                x1 = x0 + tile
-                y1 = y0 + tile
-            
-                draw_overlay = False 
-                overlay_color = "#000000"
-
-                if settings_state.enable_bad_rect and (i, j) in square_state.bad_coords:
-                    overlay_color = "#ff0000"
-                    draw_overlay = True
-
-                if (i, j) in square_state.hint_coords:
-                    overlay_color = "#00ff00"
-                    draw_overlay = True
-                    
-                if draw_overlay:
-                    self.canvas.create_rectangle(x0, y0, x1, y1, fill='', outline=overlay_color, width=4)
 
+        # items are kept between calls and only rebuilt when the layout
+        # changes, or after a zoom preview stretched them
+        if self.layout != (numRows, numCols, tile) or self.zoom != 1.0:
+            self.build(numRows, numCols, tile)
+
+        if settings_state.theme is not self.theme:
+            self.theme = settings_state.theme
+            self.slot_drawn = [None] * len(self.slots)
+
+        self.board_state = board_state
+        self.settings_state = settings_state
+        clicked_tile = square_state.clicked_square
+        self.clicked_idx = None
+        if clicked_tile:
+            self.clicked_idx = clicked_tile[0] * numCols + clicked_tile[1]
+
+        # overlays, hint over bad over fit
+        self.wanted = {}
+        if settings_state.enable_fit_rect:
+            for coord in square_state.fit_coords:
+                self.wanted[coord] = "#00bfff"
+        if settings_state.enable_bad_rect:
+            for coord in square_state.bad_coords:
+                self.wanted[coord] = "#ff0000"
+        for coord in square_state.hint_coords:
+            self.wanted[coord] = "#00ff00"
+
+        self.update_viewport()
+
+        if self.images_pending:
+            self.images_pending = False
+            self.root.after(IMAGE_LOAD_MS, self.load_tile_images)
+
+    def load_tile_images(self):
+        try:
+            from view.tile_images import TileImageCache
+        except ImportError:
+            # without Pillow, tiles stay canvas polygons and text
+            return
+        self.tile_images = TileImageCache(self.canvas)
+        self.layout = None
+        self.controller.refresh()
+
+    def visible_range(self):
+        # rows i0..i1 and columns j0..j1 (exclusive) that touch the viewport
+        num_rows, num_cols, tile = self.layout
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+
+        i0 = max(0, int(top // tile))
+        i1 = min(num_rows, int((top + height) // tile) + 1)
+        # one extra column on the left for the gap between the two grids
+        j0 = max(0, int(left // tile) - 1)
+        j1 = min(num_cols, int((left + width) // tile) + 1)
+        return i0, i1, j0, j1
+
+    def update_viewport(self):
+        # map slots onto the visible cells and bring those up to date.
+        # Slot positions are stale while a zoom preview is showing
+        if self.board_state is None or self.layout is None or self.zoom != 1.0:
+            return
+        num_rows, num_cols, tile = self.layout
+        i0, i1, j0, j1 = self.visible = self.visible_range()
+
+        slot_of = self.slot_of
+        for idx in list(slot_of):
+            i, j = divmod(idx, num_cols)
+            if not (i0 <= i < i1 and j0 <= j < j1):
+                self.free_slots.append(slot_of.pop(idx))
+
+        for i in range(i0, i1):
+            for j in range(j0, j1):
+                idx = i * num_cols + j
+                if idx in slot_of:
+                    continue
+                slot = self.free_slots.pop() if self.free_slots else self.create_slot(tile)
+                x0, y0, _, _ = self.cell_bbox(i, j, tile, num_cols)
+                self.move_slot(slot, x0, y0)
+                slot_of[idx] = slot
+
+        # slots nobody took this time leave the view
+        park_x, park_y = self.park_pos()
+        for slot in self.free_slots:
+            self.move_slot(slot, park_x, park_y)
+
+        # reconfigure only the slots whose content or dimming changed
+        board = self.board_state.grid
+        theme = self.settings_state.theme
+        palette = self.settings_state.palette
+        clicked_idx = self.clicked_idx
+        slot_drawn = self.slot_drawn
+        for idx, slot in slot_of.items():
+            state = (board.tile(idx) if board.active[idx] else None, idx == clicked_idx)
+            if state != slot_drawn[slot]:
+                slot_drawn[slot] = state
+                self.configure_slot(slot, state[0], state[1], theme, palette)
+
+        self.update_overlays()
+
+    def update_overlays(self):
+        i0, i1, j0, j1 = self.visible
+        wanted = {
+            coord: color for coord, color in self.wanted.items()
+            if i0 <= coord[0] < i1 and j0 <= coord[1] < j1
+        }
+
+        for coord in list(self.overlays):
+            if coord not in wanted:
+                item = self.overlays.pop(coord)
+                self.canvas.itemconfig(item, state=tk.HIDDEN)
+                self.free_overlays.append(item)
+                self.overlay_colors.pop(coord, None)
+
+        created = False
+        numRows, numCols, tile = self.layout
+        for coord, color in wanted.items():
+            item = self.overlays.get(coord)
+            if item is None:
+                bbox = self.cell_bbox(coord[0], coord[1], tile, numCols)
+                if self.free_overlays:
+                    item = self.free_overlays.pop()
+                    self.canvas.coords(item, *bbox)
+                else:
+                    item = self.canvas.create_rectangle(*bbox, fill='', width=4, tags="overlay")
+                    self.items_created += 1
+                    created = True
+                self.overlays[coord] = item
+            elif self.overlay_colors.get(coord) == color:
+                continue
+            self.canvas.itemconfig(item, outline=color, state=tk.NORMAL)
+            self.overlay_colors[coord] = color
+
+        # new overlay rects have to sit above every cell
+        if created:
+            self.canvas.tag_raise("overlay")
+            if self.debug_item is not None:
+                self.canvas.tag_raise("debug")
+
+    def show_debug(self, lines):
+        # profiler readout in the top left corner of the view, above everything else
+        text = "\n".join(lines)
+        x, y = self.canvas.canvasx(4), self.canvas.canvasy(4)
+        if self.debug_item is None:
+            self.debug_item = self.canvas.create_text(
+                x, y, anchor=tk.NW, font="TkFixedFont", fill="#ffff00", tags="debug"
+            )
+        self.canvas.coords(self.debug_item, x, y)
+        self.canvas.itemconfig(self.debug_item, text=text, state=tk.NORMAL)
+        self.canvas.tag_raise("debug")
+
+    def hide_debug(self):
+        if self.debug_item is not None:
+            self.canvas.itemconfig(self.debug_item, state=tk.HIDDEN)
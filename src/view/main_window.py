@@ -2,6 +2,7 @@
 
 from abc import ABC, abstractmethod
 import tkinter as tk 
+from tkinter import filedialog, messagebox, simpledialog
 
 from view.popups import PrefsPopup, AboutPopup, WinPopup
 from view.main_canvas import MainCanvas 
@@ -18,7 +19,8 @@ class MainWindow(tk.Frame):
         
         self.setup_menubar()
 
-        root.bind("<Escape>", lambda event: root.quit() ) 
+        root.bind("<Escape>", lambda event: controller.on_quit() )
+        root.protocol("WM_DELETE_WINDOW", controller.on_quit)
 
     def setup_menubar(self):
         # callback functions
@@ -39,6 +41,17 @@ class MainWindow(tk.Frame):
                 label=my_label,
                 command=lambda size=i: on_new_game(size)
             )
+        large_menu = tk.Menu(file_menu, tearoff=0)
+        for i in (12, 16, 24, 32, 48, 64):
+            large_menu.add_command(
+                label="New {}x{}".format(i, i),
+                command=lambda size=i: on_new_game(size)
+            )
+        file_menu.add_cascade(label="Large Boards", menu=large_menu)
+        file_menu.add_separator()
+        file_menu.add_command(label="Open Pack...", command=self.open_pack)
+        file_menu.add_command(label="Go to Puzzle...", command=self.goto_puzzle)
+        file_menu.add_command(label="Next Puzzle", command=self.controller.on_next_puzzle)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=lambda: on_quit() )
         menubar.add_cascade(label="File", menu=file_menu)
@@ -52,5 +65,31 @@ class MainWindow(tk.Frame):
         about_menu = tk.Menu(menubar, tearoff=0)
         about_menu.add_command(label="Open About", command=lambda: on_about_popup() )
         menubar.add_cascade(label="About", menu=about_menu)
-        
-        
+
+    def open_pack(self):
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Open Puzzle Pack",
+            filetypes=[("Puzzle packs", "*.tvxp"), ("All files", "*")],
+        )
+        if not path:
+            return
+        try:
+            self.controller.on_open_pack(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open Pack", str(e), parent=self.root)
+
+    def goto_puzzle(self):
+        count = self.controller.get_pack_size()
+        if not count:
+            messagebox.showinfo("Go to Puzzle", "Open a puzzle pack first.", parent=self.root)
+            return
+        number = simpledialog.askinteger(
+            "Go to Puzzle",
+            "Puzzle number (1-{}):".format(count),
+            parent=self.root,
+            minvalue=1,
+            maxvalue=count,
+        )
+        if number is not None:
+            self.controller.on_goto_puzzle(number - 1)
@@ -9,9 +9,32 @@ class AbstractPopup(ABC):
         self.root = root
         self.controller = controller
 
+        # built on first trigger, then withdrawn on close and shown again
+        self.popup = None
+
     @abstractmethod
-    def trigger(self):
+    def build(self, popup):
+        pass
+
+    def update(self):
+        # brings the widgets up to date before the popup is shown again
         pass
+
+    def trigger(self):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.root)
+            self.popup.protocol("WM_DELETE_WINDOW", self.hide)
+            self.popup.bind("<Return>", lambda event: self.hide() )
+            self.build(self.popup)
+        else:
+            self.update()
+            self.popup.deiconify()
+
+        self.center_popup(self.popup)
+        self.popup.lift()
+
+    def hide(self):
+        self.popup.withdraw()
     
     def center_popup(self, popup):
         popup.update_idletasks()
@@ -38,10 +61,9 @@ class PrefsPopup(AbstractPopup):
         super().__init__(root, controller)
         self.settings_manager = controller.settings_manager
 
-        current_settings = self.settings_manager.get_state() 
-
-        self.radio_var_1 = tk.StringVar(value=current_settings.theme.name)
-        self.checkbox_var_1 = tk.BooleanVar(value=current_settings.enable_bad_rect)
+        self.radio_var_1 = None
+        self.checkbox_var_1 = None
+        self.checkbox_var_2 = None
 
     def on_radio_1(self):
         var = self.radio_var_1.get()
@@ -52,15 +74,26 @@ class PrefsPopup(AbstractPopup):
         var = self.checkbox_var_1.get()
         self.settings_manager.set_enable_bad_rect(var)
         self.controller.refresh()
+
+    def on_checkbox_2(self):
+        var = self.checkbox_var_2.get()
+        self.settings_manager.set_enable_fit_rect(var)
+        self.controller.refresh()
         
-    def trigger(self):
-        popup = tk.Toplevel(self.root)
+    def update(self):
+        current_settings = self.settings_manager.get_state()
+        self.radio_var_1.set(current_settings.theme.name)
+        self.checkbox_var_1.set(current_settings.enable_bad_rect)
+        self.checkbox_var_2.set(current_settings.enable_fit_rect)
+
+    def build(self, popup):
         popup.title("Preferences Window")
         popup.geometry("400x400")
-        
-        popup.bind("<Return>", lambda event: popup.destroy() )
-        
-        self.center_popup(popup)
+
+        current_settings = self.settings_manager.get_state()
+        self.radio_var_1 = tk.StringVar(popup, value=current_settings.theme.name)
+        self.checkbox_var_1 = tk.BooleanVar(popup, value=current_settings.enable_bad_rect)
+        self.checkbox_var_2 = tk.BooleanVar(popup, value=current_settings.enable_fit_rect)
 
         tk.Label(popup, text="Color Theme").pack(pady=4)
         
@@ -80,13 +113,20 @@ class PrefsPopup(AbstractPopup):
             text="Enable Bad Rect Outline",
             variable=self.checkbox_var_1,
             command=self.on_checkbox_1,
-        ).pack(pady=20)
+        ).pack(pady=(20, 4))
+
+        tk.Checkbutton(
+            popup,
+            text="Outline Cells The Selected Tile Fits",
+            variable=self.checkbox_var_2,
+            command=self.on_checkbox_2,
+        ).pack(pady=(4, 20))
 
         # --- Close Button ---
         tk.Button(
             popup,
             text="Okay",
-            command=popup.destroy,
+            command=self.hide,
         ).pack(pady=5)
         
 
@@ -95,15 +135,10 @@ class AboutPopup(AbstractPopup):
     def __init__(self, root, controller):
         super().__init__(root, controller)
     
-    def trigger(self):
-        popup = tk.Toplevel(self.root)
+    def build(self, popup):
         popup.title("About Window")
         popup.geometry("500x400")
-        
-        popup.bind("<Return>", lambda event: popup.destroy() )
 
-        self.center_popup(popup)
-        
         label_1 = tk.Label(popup, text="How to play", bg='#777777', font=("Arial", 16))
         label_1.pack(pady=4)
 
@@ -124,14 +159,19 @@ class AboutPopup(AbstractPopup):
         msg = '\n'.join([
             'CTRL N : New game',
             'CTRL H : Get hint',
+            'CTRL Z : Undo',
+            'CTRL Y : Redo',
             'CTRL - : Zoom out',
             'CTRL = : Zoom in',
+            'CTRL + mouse wheel : Zoom',
+            'Middle drag / wheel : Scroll',
+            'CTRL D : Show timings',
             'ESCAPE : Quit program'
         ])
         label_4 = tk.Label(popup, text=msg, font="TkFixedFont", anchor="w", justify="left")
         label_4.pack(pady=4)
 
-        close_button = tk.Button(popup, text="Okay", command=popup.destroy)
+        close_button = tk.Button(popup, text="Okay", command=self.hide)
         close_button.pack(pady=20)
 
 
@@ -139,18 +179,13 @@ class WinPopup(AbstractPopup):
     def __init__(self, root, controller):
         super().__init__(root, controller)
     
-    def trigger(self):
-        popup = tk.Toplevel(self.root)
+    def build(self, popup):
         popup.title("Game over")
         popup.geometry("300x200")
-        
-        popup.bind("<Return>", lambda event: popup.destroy() )
-
-        self.center_popup(popup)
 
         msg = '\n'.join([ "You completed the puzzle!", "Congrats!" ])
         label = tk.Label(popup, text=msg).pack(pady=20)
         
-        close_button = tk.Button(popup, text="Okay", command=popup.destroy).pack(pady=4)
+        close_button = tk.Button(popup, text="Okay", command=self.hide).pack(pady=4)
         
 
@@ -0,0 +1,79 @@
+# tile_images.py
+
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+
+class TileImageCache:
+    """
+    Tiles rendered once with Pillow and reused as Tk images.
+
+    Callers key images by (tile, theme, tile_size, dimmed). The least recently
+    used image is dropped once max_size is exceeded; cells keep their own
+    reference to the image they show, so eviction never blanks a visible tile.
+    """
+
+    def __init__(self, canvas, max_size: int = 2048):
+        self.canvas = canvas
+        self.max_size = max_size
+        self.images = OrderedDict()
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        photo = self.images.get(key)
+        if photo is None:
+            self.misses += 1
+            return None
+        self.images.move_to_end(key)
+        self.hits += 1
+        return photo
+
+    def add(self, key, tile, tile_size, fills, text_colors, outline_color, bg_color):
+        image = self.render(tile, tile_size, fills, text_colors, outline_color, bg_color)
+        photo = ImageTk.PhotoImage(image, master=self.canvas)
+        self.images[key] = photo
+        if len(self.images) > self.max_size:
+            self.images.popitem(last=False)
+        return photo
+
+    def clear(self):
+        self.images.clear()
+
+    def get_font(self, tile_size):
+        # Tk font sizes are points, Pillow wants pixels
+        px = max(1, round(tile_size * 0.15 * 96 / 72))
+        font = self.fonts.get(px)
+        if font is None:
+            font = ImageFont.load_default(size=px)
+            self.fonts[px] = font
+        return font
+
+    def render(self, tile, tile_size, fills, text_colors, outline_color, bg_color) -> "Image.Image":
+        size = tile_size
+        image = Image.new("RGB", (size + 1, size + 1), bg_color)
+        draw = ImageDraw.Draw(image)
+
+        c = (size // 2, size // 2)
+        nw, ne, sw, se = (0, 0), (size, 0), (0, size), (size, size)
+        triangles = [
+            [c, ne, nw],  # N
+            [c, se, ne],  # E
+            [c, sw, se],  # S
+            [c, nw, sw],  # W
+        ]
+        text_positions = [
+            (int(size * 0.50), int(size * 0.25)),
+            (int(size * 0.75), int(size * 0.50)),
+            (int(size * 0.50), int(size * 0.75)),
+            (int(size * 0.25), int(size * 0.50)),
+        ]
+
+        font = self.get_font(tile_size)
+        for k, val in enumerate(tile):
+            draw.polygon(triangles[k], fill=fills[k], outline=outline_color)
+            draw.text(text_positions[k], str(val), fill=text_colors[k], font=font, anchor="mm")
+
+        return image
@@ -0,0 +1,9 @@
+# conftest.py
+#
+# The game runs from src/ with its packages at the top level; tests import
+# them the same way.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,32 @@
+# test_board.py
+
+from model.board import Board
+
+
+def test_set_tile_and_block_view():
+    board = Board(2, 4)
+    board.set_tile(board.index(1, 2), (1, 2, 3, 4), board.index(0, 3))
+    block = board[1][2]
+    assert (block.n, block.e, block.s, block.w) == (1, 2, 3, 4)
+    assert block.active
+    assert (block.ci, block.cj) == (0, 3)
+    assert not board[0][0].active
+
+
+def test_swap_moves_the_whole_cell():
+    board = Board(2, 4)
+    board.set_tile(0, (1, 2, 3, 4), 5)
+    board.swap(0, 7)
+    assert board.tile(7) == (1, 2, 3, 4)
+    assert board.active[7] and not board.active[0]
+    assert board.home[7] == 5
+
+
+def test_copy_is_independent():
+    board = Board(2, 4)
+    board.set_tile(0, (1, 2, 3, 4), 0)
+    other = board.copy()
+    other.swap(0, 1)
+    assert board.tile(0) == (1, 2, 3, 4)
+    assert other.tile(1) == (1, 2, 3, 4)
+    assert other.nbytes() == board.nbytes()
@@ -0,0 +1,61 @@
+# test_compat.py
+
+import random
+
+import pytest
+
+from model.board import E, N, S, W
+from model.engine import Engine
+
+
+def fits(board, idx):
+    # the tile in idx matches every active RHS neighbour
+    num_cols = board.num_cols
+    offset = num_cols // 2
+    i, j = divmod(idx, num_cols)
+    tile = board.tile(idx)
+    around = []
+    if i > 0:
+        around.append((idx - num_cols, N, S))
+    if j + 1 < num_cols:
+        around.append((idx + 1, E, W))
+    if i + 1 < board.num_rows:
+        around.append((idx + num_cols, S, N))
+    if j > offset:
+        around.append((idx - 1, W, E))
+    return all(not board.active[nb] or tile[side] == board.tile(nb)[facing] for nb, side, facing in around)
+
+
+def brute_swap_targets(board, src):
+    num_cols = board.num_cols
+    offset = num_cols // 2
+    targets = set()
+    if not board.active[src]:
+        return targets
+    for dst in range(len(board.active)):
+        if dst == src or dst % num_cols < offset:
+            continue
+        trial = board.copy()
+        trial.swap(src, dst)
+        if fits(trial, dst):
+            targets.add(dst)
+    return targets
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_swap_targets_match_brute_force(seed):
+    rng = random.Random(seed)
+    engine = Engine()
+    engine.new_game(rng.choice([3, 4, 5]), rng)
+    board = engine.board
+    num_cells = len(board.active)
+    index = engine.fit_index()
+    for _ in range(40):
+        # swaps go through the engine so the index sees them as pending;
+        # past max_pending of them it rebuilds instead
+        for _ in range(rng.choice([1, 1, 60])):
+            engine.swap_cells(rng.randrange(num_cells), rng.randrange(num_cells))
+        src = rng.randrange(num_cells)
+        mask = index.swap_targets(src)
+        got = {idx for idx in range(num_cells) if mask >> idx & 1}
+        assert got == brute_swap_targets(board, src)
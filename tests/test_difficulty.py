@@ -0,0 +1,66 @@
+# test_difficulty.py
+
+import random
+
+from model.difficulty import RatingCache, canonical_key, rate, rate_all
+from model.generate import solved_tiles
+
+
+def packed_puzzle(size, rng):
+    return bytes(value for tile in solved_tiles(size, rng) for value in tile)
+
+
+def test_canonical_key_ignores_tile_order():
+    rng = random.Random(3)
+    packed = packed_puzzle(3, rng)
+    tiles = [packed[k:k + 4] for k in range(0, len(packed), 4)]
+    rng.shuffle(tiles)
+    assert canonical_key(3, b"".join(tiles)) == canonical_key(3, packed)
+    assert canonical_key(4, packed) != canonical_key(3, packed)
+
+
+def test_rate_counts_solutions():
+    rating = rate(3, packed_puzzle(3, random.Random(1)))
+    assert rating.solutions >= 1 and not rating.aborted
+    assert rating.nodes >= 9 and rating.score >= 0
+
+    cut = rate(4, packed_puzzle(4, random.Random(1)), max_nodes=3)
+    assert cut.aborted and cut.nodes == 3 and cut.max_nodes == 3
+
+
+def test_cache_hits_and_budgets(tmp_path):
+    path = str(tmp_path / "r.sqlite")
+    done = rate(3, packed_puzzle(3, random.Random(1)))
+    cut = rate(4, packed_puzzle(4, random.Random(1)), max_nodes=3)
+    with RatingCache(path) as cache:
+        cache.put_many({"done": done, "cut": cut})
+        assert len(cache) == 2
+
+    with RatingCache(path) as cache:
+        # finished ratings hold for any budget
+        assert cache.get_many(["done", "missing"], max_nodes=None) == {"done": done}
+        # aborted ones only for budgets no larger than theirs
+        assert set(cache.get_many(["done", "cut"], max_nodes=3)) == {"done", "cut"}
+        assert set(cache.get_many(["done", "cut"], max_nodes=4)) == {"done"}
+        assert set(cache.get_many(["cut"], max_nodes=None)) == set()
+        got = cache.get_many(["cut"], max_nodes=2)["cut"]
+        assert got.aborted is True and got == cut
+
+
+def test_rate_all_uses_the_cache(tmp_path):
+    rng = random.Random(5)
+    puzzles = [(3, packed_puzzle(3, rng)) for _ in range(4)]
+    # the same tiles in another order share a key and are rated once
+    tiles = [puzzles[0][1][k:k + 4] for k in range(0, 36, 4)]
+    puzzles.append((3, b"".join(reversed(tiles))))
+
+    with RatingCache(str(tmp_path / "r.sqlite")) as cache:
+        first = list(rate_all(puzzles, cache, workers=1))
+        assert [cached for _, _, cached in first] == [False] * 5
+        assert first[0][:2] == first[4][:2]
+        assert len(cache) == 4
+
+        second = list(rate_all(puzzles, cache, workers=1))
+        assert [cached for _, _, cached in second] == [True] * 5
+        assert [key for key, _, _ in second] == [key for key, _, _ in first]
+        assert [r for _, r, _ in second] == [r for _, r, _ in first]
@@ -0,0 +1,120 @@
+# test_engine.py
+
+import random
+
+import pytest
+
+from model.board import Board, E, N, S, W
+from model.engine import Engine, Move, SearchAborted, iter_solutions
+from model.generate import solved_tiles
+from model.solver import Solver
+
+
+def recount(board):
+    # bad_edges, bad_count and empty_rhs worked out from scratch
+    num_rows, num_cols = board.num_rows, board.num_cols
+    offset = num_cols // 2
+    bad_edges = 0
+    bad_count = bytearray(num_rows * num_cols)
+    empty_rhs = 0
+    for i in range(num_rows):
+        for j in range(offset, num_cols):
+            idx = i * num_cols + j
+            empty_rhs += not board.active[idx]
+            pairs = []
+            if j + 1 < num_cols:
+                pairs.append((idx + 1, E, W))
+            if i + 1 < num_rows:
+                pairs.append((idx + num_cols, S, N))
+            for nb, side, facing in pairs:
+                if board.active[idx] and board.active[nb] and board.tile(idx)[side] != board.tile(nb)[facing]:
+                    bad_edges += 1
+                    bad_count[idx] += 1
+                    bad_count[nb] += 1
+    return bad_edges, bad_count, empty_rhs
+
+
+def shuffled_engine(seed, size, moves):
+    rng = random.Random(seed)
+    random.seed(seed)
+    engine = Engine()
+    engine.new_game(size)
+    engine.zobrist  # start tracking hashes before the moves
+    num_rows, num_cols = engine.board.num_rows, engine.board.num_cols
+    for _ in range(moves):
+        engine.make_move(Move(
+            rng.randrange(num_rows), rng.randrange(num_cols),
+            rng.randrange(num_rows), rng.randrange(num_cols),
+        ))
+    return engine
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_state_matches_recount(seed):
+    engine = shuffled_engine(seed, random.Random(seed).choice([2, 3, 5, 8]), 300)
+    bad_edges, bad_count, empty_rhs = recount(engine.board)
+    assert engine.bad_edges == bad_edges
+    assert engine.bad_count == bad_count
+    assert engine.empty_rhs == empty_rhs
+    num_cols = engine.board.num_cols
+    assert engine.wrong == {divmod(idx, num_cols) for idx, count in enumerate(bad_count) if count}
+    assert engine.is_solved() == (bad_edges == 0 and empty_rhs == 0)
+
+
+def test_hint_moves_solve_the_board():
+    random.seed(1)
+    engine = Engine()
+    engine.new_game(4)
+    for _ in range(16):
+        (i1, j1), (i2, j2) = engine.get_hint_coords()
+        engine.make_move(Move(i1, j1, i2, j2))
+    assert engine.is_solved()
+    assert engine.get_wrong_coords() == []
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_hashes_match_fresh_engine(seed):
+    engine = shuffled_engine(seed, 4, 300)
+    fresh = Engine()
+    fresh.set_board(engine.board.copy())
+    assert engine.zobrist == fresh.zobrist
+    assert engine.canonical_hash == fresh.canonical_hash
+    assert list(engine.codes) == list(fresh.codes)
+
+
+def test_canonical_hash_ignores_lhs_order():
+    engine = Engine()
+    engine.new_game(4, random.Random(1))
+    other = Engine()
+    other.set_board(engine.board.copy())
+    other.swap_cells(0, 1)  # both on the LHS
+    assert other.canonical_hash == engine.canonical_hash
+    assert other.zobrist != engine.zobrist
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_iter_solutions_counts_match_solver(seed):
+    rng = random.Random(seed)
+    tiles = solved_tiles(3, rng, num_values=2)
+    engine = Engine()
+    engine.load_tiles(3, tiles, rng)
+    expected = len(list(Solver(tiles, 3, 3).iter_solutions()))
+    assert len(list(engine.iter_solutions())) == expected >= 1
+    assert len(list(iter_solutions(engine.board, limit=1))) == 1
+    assert list(iter_solutions(engine.board, limit=0)) == []
+
+
+@pytest.mark.parametrize("value", [16, 0x20, 0x30, 0x7f, -1])
+def test_set_board_rejects_wide_edges(value):
+    board = Board(2, 4)
+    board.set_tile(2, (1, 2, 3, value), 2)
+    with pytest.raises(ValueError):
+        Engine().set_board(board)
+
+
+def test_iter_solutions_raises_when_cut_short():
+    engine = Engine()
+    engine.new_game(4, random.Random(2))
+    with pytest.raises(SearchAborted) as info:
+        list(iter_solutions(engine.board, max_nodes=5))
+    assert info.value.found == 0
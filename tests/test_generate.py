@@ -0,0 +1,67 @@
+# test_generate.py
+
+import random
+
+from model.generate import (
+    count_solutions, format_puzzle, parse_puzzle, solved_batches, solved_tiles, unique_batches, unpack_tiles,
+)
+
+
+def is_solution(tiles, size):
+    for i in range(size):
+        for j in range(size):
+            tile = tiles[i * size + j]
+            if j + 1 < size and tile[1] != tiles[i * size + j + 1][3]:
+                return False
+            if i + 1 < size and tile[2] != tiles[(i + 1) * size + j][0]:
+                return False
+    return True
+
+
+def test_batches_are_solved_boards():
+    rng = random.Random(1)
+    boards = [packed for batch in solved_batches(5, 300, rng, batch_size=128) for packed in batch]
+    assert len(boards) == 300
+    for packed in boards:
+        tiles = unpack_tiles(packed)
+        assert is_solution(tiles, 5)
+        assert max(packed) < 10
+
+
+def test_seeded_runs_repeat():
+    assert solved_tiles(6, random.Random(9)) == solved_tiles(6, random.Random(9))
+
+
+def test_puzzle_line_round_trip():
+    rng = random.Random(2)
+    packed = bytes(value for tile in solved_tiles(4, rng) for value in tile)
+    size, tiles = parse_puzzle(format_puzzle(4, packed))
+    assert size == 4
+    assert bytes(value for tile in tiles for value in tile) == packed
+
+
+def test_unique_batches_keep_single_solution_boards():
+    boards = [packed for batch in unique_batches(3, 6, random.Random(4), workers=1, batch_size=4) for packed in batch]
+    assert len(boards) == 6
+    for packed in boards:
+        assert is_solution(unpack_tiles(packed), 3)
+        assert count_solutions(3, packed, limit=10) == 1
+
+
+def test_unique_batches_ignore_worker_count():
+    one = list(unique_batches(3, 5, random.Random(5), workers=1))
+    two = list(unique_batches(3, 5, random.Random(5), workers=2))
+    assert one == two
+
+
+def test_count_solutions_stops_at_limit():
+    # identical tiles count as one arrangement
+    assert count_solutions(2, bytes(4 * 4), limit=5) == 1
+    # with two edge values most 3x3 boards have several solutions
+    rng = random.Random(6)
+    for packed in next(solved_batches(3, 20, rng, num_values=2)):
+        total = count_solutions(3, packed, limit=1000)
+        if total > 2:
+            assert count_solutions(3, packed, limit=2) == 2
+            return
+    raise AssertionError("no board with several solutions")
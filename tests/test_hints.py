@@ -0,0 +1,130 @@
+# test_hints.py
+
+import random
+import threading
+
+from model.engine import Engine, Move
+from model.hints import HintPlan, HintWorker, solve_plan
+
+
+def new_engine(size, seed):
+    engine = Engine()
+    engine.new_game(size, random.Random(seed))
+    return engine
+
+
+def move(engine, plan, a, b):
+    engine.make_move(Move(a[0], a[1], b[0], b[1]))
+    if plan:
+        plan.swap(a, b)
+
+
+def follow(engine, plan):
+    # plays the plan's moves; each one puts at least one tile in place
+    for _ in range(engine.board.num_rows * engine.board.num_cols):
+        step = plan.next_move()
+        if not step:
+            break
+        move(engine, plan, step[0], step[1])
+    return engine.is_solved()
+
+
+def scramble(engine, plan, rng, moves):
+    num_rows, num_cols = engine.board.num_rows, engine.board.num_cols
+    for _ in range(moves):
+        a = (rng.randrange(num_rows), rng.randrange(num_cols))
+        b = (rng.randrange(num_rows), rng.randrange(num_cols))
+        move(engine, plan, a, b)
+
+
+def test_home_plan_solves_the_board():
+    engine = new_engine(5, 1)
+    assert follow(engine, HintPlan.from_homes(engine.board))
+    assert HintPlan.from_homes(engine.board).next_move() == []
+
+
+def test_plan_survives_any_moves():
+    engine = new_engine(4, 2)
+    plan = HintPlan.from_homes(engine.board)
+    scramble(engine, plan, random.Random(2), 50)
+    assert follow(engine, plan)
+
+
+def test_solve_plan_keeps_fitting_tiles():
+    engine = new_engine(4, 3)
+    board = engine.board
+    # put the top-left 2x2 block of the solution in place
+    for i in range(2):
+        for j in range(4, 6):
+            home = i * 8 + j
+            src = next(idx for idx in range(32) if board.active[idx] and board.home[idx] == home)
+            move(engine, None, divmod(src, 8), (i, j))
+
+    plan = solve_plan(engine.board.copy())
+    assert plan is not None
+    for i in range(2):
+        for j in range(4, 6):
+            assert plan.source[(i, j)] == (i, j)
+    assert follow(engine, plan)
+
+
+def test_worker_posts_plans_for_the_latest_board():
+    engine = new_engine(4, 4)
+    scramble(engine, None, random.Random(4), 30)
+    worker = HintWorker()
+    try:
+        worker.submit(1, engine.board.copy())
+        worker.submit(2, engine.board.copy())
+        while True:
+            generation, plan = worker.results.get(timeout=30)
+            if generation == 2:
+                break
+        assert plan is not None
+        assert follow(engine, plan)
+    finally:
+        worker.close()
+
+
+def test_solve_plan_honours_stop():
+    stop = threading.Event()
+    stop.set()
+    engine = new_engine(5, 5)
+    scramble(engine, None, random.Random(5), 30)
+    assert solve_plan(engine.board.copy(), stop=stop) is None
+
+
+def test_solve_plan_skips_boards_with_too_many_open_cells():
+    # a fresh 8x8 deal leaves 64 RHS cells to fill, past HINT_MAX_CELLS
+    engine = new_engine(8, 6)
+    assert solve_plan(engine.board.copy(), max_nodes=None) is None
+
+
+def test_lone_tiles_do_not_count_as_fitting():
+    engine = new_engine(3, 7)
+    board = engine.board
+    # a tile alone on the RHS matches nothing, so it is not kept in place
+    lone = next(idx for idx in range(18) if board.active[idx] and board.home[idx] not in (4, 5, 17))
+    move(engine, None, divmod(lone, 6), (2, 5))
+    assert engine.fitting_cells() == []
+
+    # two tiles next to their solved neighbours fit
+    for home in (4, 5):
+        src = next(idx for idx in range(18) if board.active[idx] and board.home[idx] == home)
+        move(engine, None, divmod(src, 6), divmod(home, 6))
+    assert sorted(engine.fitting_cells()) == [4, 5]
+    targets = engine.solve(keep_fitting=True)
+    assert targets[(0, 4)] == (0, 4) and targets[(0, 5)] == (0, 5)
+
+
+def test_worker_posts_none_when_the_solve_fails():
+    worker = HintWorker()
+    try:
+        # not a board; the solve raises in the child process
+        worker.submit(1, None)
+        assert worker.results.get(timeout=30) == (1, None)
+        engine = new_engine(3, 8)
+        worker.submit(2, engine.board.copy())
+        generation, plan = worker.results.get(timeout=30)
+        assert generation == 2 and plan is not None
+    finally:
+        worker.close()
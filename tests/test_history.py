@@ -0,0 +1,41 @@
+# test_history.py
+
+from model.history import MoveLog
+
+
+def test_undo_redo():
+    log = MoveLog()
+    assert log.undo() is None
+    assert log.redo() is None
+
+    log.record(1, 2)
+    log.record(3, 4)
+    log.record(5, 6)
+    assert len(log) == 3
+    assert log.undo() == (5, 6)
+    assert log.undo() == (3, 4)
+    assert log.redo() == (3, 4)
+    assert log.redo() == (5, 6)
+    assert log.redo() is None
+
+
+def test_record_drops_undone_moves():
+    log = MoveLog()
+    log.record(1, 2)
+    log.record(3, 4)
+    log.undo()
+    log.record(7, 8)
+    assert len(log) == 2
+    assert log.redo() is None
+    assert log.undo() == (7, 8)
+    assert log.undo() == (1, 2)
+    assert log.undo() is None
+
+
+def test_clear():
+    log = MoveLog()
+    log.record(1, 2)
+    log.clear()
+    assert len(log) == 0
+    assert log.undo() is None
+    assert log.nbytes() == 0
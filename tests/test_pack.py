@@ -0,0 +1,51 @@
+# test_pack.py
+
+import random
+
+import pytest
+
+from model.generate import solved_tiles
+from model.pack import PackWriter, PuzzlePack, write_pack
+
+
+def packed_puzzle(size, rng):
+    return bytes(value for tile in solved_tiles(size, rng) for value in tile)
+
+
+def test_pack_round_trip(tmp_path):
+    rng = random.Random(1)
+    puzzles = [(size, packed_puzzle(size, rng)) for size in (1, 2, 3, 5, 8)]
+    path = str(tmp_path / "p.tvxp")
+    assert write_pack(path, puzzles) == len(puzzles)
+    with PuzzlePack(path) as pack:
+        assert len(pack) == len(puzzles)
+        assert [pack[n] for n in range(len(pack))] == puzzles
+        assert pack[-1] == puzzles[-1]
+        assert pack.tiles(2) == (3, [tuple(puzzles[2][1][k:k + 4]) for k in range(0, 36, 4)])
+        with pytest.raises(IndexError):
+            pack[len(puzzles)]
+
+
+def test_pack_rejects_other_files(tmp_path):
+    path = tmp_path / "x.tvxp"
+    path.write_bytes(b"not a pack at all, just some bytes")
+    with pytest.raises(ValueError):
+        PuzzlePack(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        PuzzlePack(str(path))
+
+
+def test_pack_rejects_truncated(tmp_path):
+    rng = random.Random(2)
+    path = tmp_path / "p.tvxp"
+    write_pack(str(path), [(4, packed_puzzle(4, rng)) for _ in range(3)])
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        PuzzlePack(str(path))
+
+
+def test_writer_rejects_bad_puzzles(tmp_path):
+    with PackWriter(str(tmp_path / "p.tvxp")) as writer:
+        with pytest.raises(ValueError):
+            writer.add(3, bytes(4 * 8))
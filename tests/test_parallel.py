@@ -0,0 +1,28 @@
+# test_parallel.py
+
+import random
+import threading
+
+from model.parallel import solve_parallel
+from model.solver import Solver
+
+from test_solver import is_solution, planted_tiles
+
+
+def test_solve_parallel_across_processes():
+    rng = random.Random(4)
+    tiles = planted_tiles(rng, 5, num_values=3)
+    # enough early branching that the work is shared out to the pool
+    assert len(Solver(tiles, 5, 5).split(2 * 16)[1]) > 1
+    solution = solve_parallel(tiles, 5, 5, workers=2)
+    assert solution is not None
+    assert sorted(solution) == sorted(tiles)
+    assert is_solution(solution, 5, 5)
+
+
+def test_solve_parallel_honours_stop():
+    rng = random.Random(4)
+    tiles = planted_tiles(rng, 5, num_values=3)
+    stop = threading.Event()
+    stop.set()
+    assert solve_parallel(tiles, 5, 5, workers=2, stop=stop) is None
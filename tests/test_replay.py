@@ -0,0 +1,107 @@
+# test_replay.py
+
+import random
+from array import array
+
+import pytest
+
+from model.history import MoveLog
+from model.replay import Recording, deal, digest, iter_recordings, random_recording, replay, write_recordings
+
+
+def test_recording_round_trip(tmp_path):
+    rng = random.Random(5)
+    recordings = [random_recording(size, rng.getrandbits(63), 50, rng) for size in (2, 3, 6)]
+    recordings.append(Recording(3, 9, array("H")))
+    path = str(tmp_path / "games.rec")
+    write_recordings(path, recordings)
+    assert list(iter_recordings(path)) == recordings
+
+
+def test_recordings_append(tmp_path):
+    rng = random.Random(6)
+    first, second = (random_recording(3, n, 10, rng) for n in range(2))
+    path = str(tmp_path / "games.rec")
+    write_recordings(path, [first])
+    write_recordings(path, [second])
+    assert list(iter_recordings(path)) == [first, second]
+
+
+def test_truncated_recording_is_rejected(tmp_path):
+    rng = random.Random(7)
+    path = tmp_path / "games.rec"
+    write_recordings(str(path), [random_recording(3, 1, 10, rng)])
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        list(iter_recordings(str(path)))
+
+
+
+@pytest.mark.parametrize("recording", [
+    Recording(0, 1, array("H")),
+    Recording(3, 1, array("H", [0, 18])),
+    Recording(2, 1, array("H", [7, 3, 8, 0])),
+])
+def test_recordings_off_the_board_are_rejected(tmp_path, recording):
+    path = str(tmp_path / "games.rec")
+    write_recordings(path, [random_recording(3, 1, 10, random.Random(1)), recording])
+    with pytest.raises(ValueError, match="corrupt"):
+        list(iter_recordings(path))
+
+
+def test_step_and_end_checks_agree():
+    rng = random.Random(8)
+    crc_step = crc_end = 0
+    for seed in range(5):
+        recording = random_recording(3, seed, 500, rng)
+        step = replay(recording, "step")
+        end = replay(recording, "end")
+        assert step.consistent
+        assert (step.solved, step.wrong) == (end.solved, end.wrong)
+        crc_step = digest(step, crc_step)
+        crc_end = digest(end, crc_end)
+    assert crc_step == crc_end
+
+
+def test_move_log_done_lists_applied_moves():
+    log = MoveLog()
+    for a, b in ((0, 3), (1, 4), (2, 5)):
+        log.record(a, b)
+    log.undo()
+    assert list(log.done()) == [0, 3, 1, 4]
+
+
+def test_solved_at_marks_the_winning_move():
+    engine = deal(3, 42)
+    num_cols = engine.board.num_cols
+    moves = array("H")
+    while True:
+        coords = engine.get_hint_coords()
+        if not coords:
+            break
+        (i1, j1), (i2, j2) = coords
+        moves.extend((i1 * num_cols + j1, i2 * num_cols + j2))
+        engine.board.swap(i1 * num_cols + j1, i2 * num_cols + j2)
+    moves.extend((0, 1))  # a move after the win
+    result = replay(Recording(3, 42, moves), "step")
+    assert result.solved_at == len(moves) // 2 - 2
+
+
+@pytest.mark.parametrize("window", [1, 4, 50])
+def test_repeat_window_matches_brute_force(window):
+    rng = random.Random(9)
+    recording = random_recording(2, 3, 300, rng)
+    assert replay(recording).repeats is None
+
+    engine = deal(recording.size, recording.seed)
+    positions = [engine.zobrist]
+    it = iter(recording.moves)
+    for a, b in zip(it, it):
+        engine.swap_cells(a, b)
+        positions.append(engine.zobrist)
+    expected = sum(
+        positions[k] in positions[max(0, k - window):k] for k in range(1, len(positions))
+    )
+    result = replay(recording, repeat_window=window)
+    assert result.repeats == expected > 0
+    assert result.consistent
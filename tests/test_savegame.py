@@ -0,0 +1,84 @@
+# test_savegame.py
+
+import random
+
+import pytest
+
+from model.board import Board
+from model.engine import Engine, Move
+from model.savegame import HEADER, AutoSaver, decode_game, encode_game, load_game
+
+
+def played_board():
+    engine = Engine()
+    engine.new_game(4, random.Random(3))
+    rng = random.Random(4)
+    for _ in range(20):
+        engine.make_move(Move(rng.randrange(4), rng.randrange(8), rng.randrange(4), rng.randrange(8)))
+    return engine.board
+
+
+def test_savegame_round_trip():
+    board = played_board()
+    saved = decode_game(encode_game(board, (1, 5), [(0, 0), (2, 6)], True))
+    assert saved.board.edges == board.edges
+    assert saved.board.active == board.active
+    assert saved.board.home == board.home
+    assert saved.clicked_square == (1, 5)
+    assert saved.hint_coords == [(0, 0), (2, 6)]
+    assert saved.seen_win
+
+    saved = decode_game(encode_game(board, None, [], False))
+    assert saved.clicked_square is None
+    assert saved.hint_coords == []
+    assert not saved.seen_win
+
+
+def test_savegame_rejects_truncated_and_foreign():
+    data = encode_game(played_board(), None, [], False)
+    with pytest.raises(ValueError):
+        decode_game(data[:-1])
+    with pytest.raises(ValueError):
+        decode_game(b"XXXX" + data[4:])
+
+
+def test_savegame_rejects_coords_off_the_board():
+    data = encode_game(played_board(), (9, 9), [], False)
+    with pytest.raises(ValueError):
+        decode_game(data)
+
+
+
+@pytest.mark.parametrize("value", [16, 0x30, 0xff])
+def test_savegame_rejects_wide_edges(value):
+    data = bytearray(encode_game(played_board(), None, [], False))
+    data[HEADER.size + 5] = value
+    with pytest.raises(ValueError):
+        decode_game(bytes(data))
+
+
+
+def test_savegame_rejects_active_flags_other_than_0_and_1():
+    data = bytearray(encode_game(played_board(), None, [], False))
+    data[HEADER.size + 32 * 4 + 3] = 2
+    with pytest.raises(ValueError, match="corrupt"):
+        decode_game(bytes(data))
+
+
+@pytest.mark.parametrize("shape", [(0, 0), (2, 2), (3, 5), (2, 8)])
+def test_savegame_rejects_other_board_shapes(shape):
+    data = encode_game(Board(*shape), None, [], False)
+    with pytest.raises(ValueError, match="corrupt"):
+        decode_game(data)
+
+
+def test_autosaver_writes_the_latest_record(tmp_path):
+    path = str(tmp_path / "save")
+    board = played_board()
+    saver = AutoSaver(path)
+    for seen_win in (False, True):
+        saver.submit(encode_game(board, None, [], seen_win))
+    assert saver.flush(5.0)
+    saver.close(5.0)
+    assert load_game(path).seen_win
+    assert saver.errors == 0
@@ -0,0 +1,67 @@
+# test_selfplay.py
+
+import random
+
+import pytest
+
+from model.engine import Engine
+from model.selfplay import GameResult, GreedyPolicy, Stats, play_game, score, simulate
+
+
+@pytest.mark.parametrize("policy", ["solver", "greedy"])
+def test_policies_solve_small_boards(policy):
+    result = play_game((3, 11, policy, 10_000))
+    assert result.solved
+    assert result.policy == policy
+    assert 0 < result.moves < 10_000
+
+
+def test_solver_policy_takes_one_move_per_tile():
+    result = play_game((4, 12, "solver", 10_000))
+    assert result.solved
+    assert result.moves <= 16
+
+
+def test_random_policy_stops_at_the_move_limit():
+    result = play_game((4, 13, "random", 50))
+    assert not result.solved
+    assert result.moves == 50
+
+
+def test_games_replay_from_their_seed():
+    first = play_game((3, 14, "greedy", 10_000))
+    second = play_game((3, 14, "greedy", 10_000))
+    assert (first.solved, first.moves) == (second.solved, second.moves)
+
+
+def test_greedy_picks_an_improving_swap():
+    rng = random.Random(15)
+    engine = Engine()
+    engine.new_game(4, rng)
+    policy = GreedyPolicy(engine, rng)
+    before = engine.board.copy()
+    start = score(engine)
+    move = policy.next_move()
+    # scoring candidates must leave the board as it was
+    assert engine.board.edges == before.edges and engine.board.active == before.active
+    engine.make_move(move)
+    assert score(engine) <= start
+
+
+def test_simulate_matches_direct_play():
+    results = list(simulate([3], 4, "solver", random.Random(16), workers=2))
+    rng = random.Random(16)
+    expected = [play_game((3, rng.getrandbits(63), "solver", 10_000)) for _ in range(4)]
+    assert [(r.seed, r.moves) for r in results] == [(r.seed, r.moves) for r in expected]
+
+
+def test_stats_summary():
+    stats = Stats()
+    for moves, solved in ((10, True), (30, True), (20, True), (99, False)):
+        stats.add(GameResult(3, 0, "greedy", solved, moves, 0.5))
+    stats.add(GameResult(4, 0, "greedy", False, 5, 1.0))
+    three, four = stats.summary()
+    assert three["games"] == 4 and three["solved"] == 3
+    assert (three["moves_min"], three["moves_p50"], three["moves_max"]) == (10, 20, 30)
+    assert three["ms_per_game"] == pytest.approx(500.0)
+    assert four["solved"] == 0 and "moves_min" not in four
@@ -0,0 +1,113 @@
+# test_solver.py
+
+import itertools
+import random
+
+import pytest
+
+from model.engine import Engine
+from model.solver import Solver
+
+
+def is_solution(tiles, num_rows, num_cols):
+    for i in range(num_rows):
+        for j in range(num_cols):
+            tile = tiles[i * num_cols + j]
+            if j + 1 < num_cols and tile[1] != tiles[i * num_cols + j + 1][3]:
+                return False
+            if i + 1 < num_rows and tile[2] != tiles[(i + 1) * num_cols + j][0]:
+                return False
+    return True
+
+
+def brute_force(tiles, num_rows, num_cols):
+    return {p for p in itertools.permutations(tiles) if is_solution(p, num_rows, num_cols)}
+
+
+def random_tiles(rng, count, num_values):
+    return [tuple(rng.randrange(num_values) for _ in range(4)) for _ in range(count)]
+
+
+def planted_tiles(rng, size, num_values=10):
+    # a solved grid: shared edges drawn once, border edges at random
+    horizontal = [[rng.randrange(num_values) for _ in range(size + 1)] for _ in range(size)]
+    vertical = [[rng.randrange(num_values) for _ in range(size)] for _ in range(size + 1)]
+    return [
+        (vertical[i][j], horizontal[i][j + 1], vertical[i + 1][j], horizontal[i][j])
+        for i in range(size)
+        for j in range(size)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_solutions_match_brute_force(seed):
+    rng = random.Random(seed)
+    num_rows, num_cols = rng.choice([(1, 3), (2, 2), (2, 3), (3, 2)])
+    tiles = random_tiles(rng, num_rows * num_cols, rng.choice([1, 2, 3]))
+    found = [tuple(solution) for solution in Solver(tiles, num_rows, num_cols).iter_solutions()]
+    # identical tiles are never permuted, so every arrangement comes once
+    assert len(found) == len(set(found))
+    assert set(found) == brute_force(tiles, num_rows, num_cols)
+
+
+@pytest.mark.parametrize("size", [3, 4, 5, 6])
+def test_solves_planted_boards(size):
+    rng = random.Random(size)
+    tiles = planted_tiles(rng, size)
+    rng.shuffle(tiles)
+    solution = Solver(tiles, size, size).solve()
+    assert solution is not None
+    assert sorted(solution) == sorted(tiles)
+    assert is_solution(solution, size, size)
+
+
+def test_fixed_tiles_stay_put():
+    rng = random.Random(7)
+    tiles = random_tiles(rng, 6, 2)
+    solver = Solver(tiles, 2, 3)
+    everything = [tuple(solution) for solution in solver.iter_solutions()]
+    assert everything
+    fixed = {4: everything[0][4]}
+    found = {tuple(solution) for solution in solver.iter_solutions(fixed)}
+    assert found == {s for s in everything if s[4] == fixed[4]}
+
+
+def test_max_nodes_sets_aborted():
+    rng = random.Random(3)
+    tiles = planted_tiles(rng, 5, 2)
+    solver = Solver(tiles, 5, 5)
+    assert list(solver.iter_solutions(max_nodes=3)) == []
+    assert solver.aborted
+
+
+def test_engine_solve_maps_every_rhs_cell():
+    engine = Engine()
+    engine.new_game(4)
+    targets = engine.solve()
+    assert sorted(targets) == [(i, j) for i in range(4) for j in range(4, 8)]
+    assert len(set(targets.values())) == 16
+
+    grid = engine.get_state().grid
+    placed = []
+    for i in range(4):
+        for j in range(4, 8):
+            si, sj = targets[(i, j)]
+            block = grid[si][sj]
+            placed.append((block.n, block.e, block.s, block.w))
+    assert is_solution(placed, 4, 4)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_split_covers_every_solution_once(seed):
+    rng = random.Random(seed)
+    size = rng.choice([2, 3, 4])
+    tiles = random_tiles(rng, size * size, rng.choice([1, 2, 3]))
+    solver = Solver(tiles, size, size)
+    everything = sorted(tuple(solution) for solution in solver.iter_solutions())
+
+    cells, prefixes = solver.split(rng.choice([2, 5, 20]))
+    parts = []
+    for prefix in prefixes:
+        fixed = {cell: solver.types[tid] for cell, tid in zip(cells, prefix)}
+        parts += [tuple(solution) for solution in Solver(tiles, size, size).iter_solutions(fixed)]
+    assert sorted(parts) == everything